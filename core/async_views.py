@@ -0,0 +1,291 @@
+"""
+Async implementations of the core read and enqueue endpoints.
+
+These are served from ``api/v1/async/`` and are meant to run under an ASGI
+server (see scripts/start_asgi.sh), where a single process can hold many
+in-flight requests while they wait on the database or the broker. Items
+are serialized exactly as by their DRF counterparts; list pages are keyset
+paginated and return only ``next`` and ``results`` (no ``count`` or
+``previous``). The task event stream lives here too, as each open stream
+would otherwise hold a worker thread.
+"""
+import base64
+import json
+import math
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+
+from .cache import get_task_representation
+from .events import format_event, get_event_bus
+from .fastpath import ValuesSerializer
+from .idempotency import async_idempotent
+from .models import Task, EmailLog
+from .outbox import enqueue
+from .filters import parse_filters
+from .search import search
+from .serializers import (
+    TaskSerializer,
+    TaskCreateSerializer,
+    EmailNotificationSerializer,
+    EmailLogSerializer
+)
+from .tasks import process_task, send_email_notification
+
+MAX_PAGE_SIZE = 100
+
+# Milliseconds an EventSource waits before reconnecting to a closed stream
+EVENT_STREAM_RETRY_MS = 1000
+
+TASK_VALUES = ValuesSerializer(TaskSerializer)
+EMAIL_LOG_VALUES = ValuesSerializer(EmailLogSerializer)
+
+
+def _json_body(request):
+    try:
+        return json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+
+
+def _csrf_failure(request):
+    # Same rule as DRF's SessionAuthentication: session-authenticated
+    # requests must pass the CSRF check, anonymous ones need not
+    check = CsrfViewMiddleware(lambda req: None)
+    check.process_request(request)
+    return check.process_view(request, None, (), {})
+
+
+@sync_to_async
+def _create_task(created_by, data):
+    # The async ORM has no transactions yet; run the INSERT pair on the
+    # sync thread so the task and its outbox message commit together
+    with transaction.atomic():
+        task = Task.objects.create(created_by=created_by, **data)
+        enqueue(process_task, task.id)
+    return task
+
+
+def _encode_cursor(timestamp, pk):
+    return base64.urlsafe_b64encode(f'{timestamp.isoformat()}|{pk}'.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        timestamp, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return parse_datetime(timestamp), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+async def _keyset_page(request, queryset, timestamp_field, values_serializer, filter_fields=(), range_fields=()):
+    """
+    One page ordered by (-timestamp, id), continuing after ``?cursor=``,
+    filtered by the given query parameters and ``?q=`` full-text search
+    """
+    try:
+        queryset = queryset.filter(**parse_filters(queryset.model, request.GET, filter_fields, range_fields))
+    except ValueError as e:
+        return JsonResponse(e.args[0], status=400)
+    queryset = search(queryset, request.GET.get('q', ''))
+    try:
+        limit = min(max(int(request.GET.get('limit', settings.REST_FRAMEWORK['PAGE_SIZE'])), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'limit': ['A valid integer is required.']}, status=400)
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        position = _decode_cursor(cursor)
+        if position is None or position[0] is None:
+            return JsonResponse({'detail': 'Invalid cursor'}, status=404)
+        timestamp, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{timestamp_field}__lt': timestamp}) | Q(**{timestamp_field: timestamp, 'pk__gt': pk})
+        )
+
+    queryset = queryset.values(*values_serializer.columns).order_by(f'-{timestamp_field}', 'id')
+    rows = [row async for row in queryset[:limit + 1]]
+    page = rows[:limit]
+
+    next_url = None
+    if len(rows) > limit:
+        last = page[-1]
+        params = request.GET.copy()
+        params['cursor'] = _encode_cursor(last[timestamp_field], last['id'])
+        next_url = request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+    return JsonResponse({
+        'next': next_url,
+        'results': values_serializer.serialize(page),
+    })
+
+
+@csrf_exempt
+@async_idempotent('task-create')
+async def task_list_create_view(request):
+    """
+    List tasks (keyset paginated) or create a task and queue processing
+    """
+    if request.method == 'GET':
+        return await _keyset_page(
+            request, Task.objects.all(), 'created_at', TASK_VALUES,
+            filter_fields=('status', 'created_by'),
+            range_fields=('created_at', 'updated_at')
+        )
+    if request.method != 'POST':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+
+    user = await request.auser()
+    if user.is_authenticated:
+        rejected = _csrf_failure(request)
+        if rejected is not None:
+            return rejected
+
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({'detail': 'JSON parse error'}, status=400)
+    serializer = TaskCreateSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    task = await _create_task(user if user.is_authenticated else None, serializer.validated_data)
+
+    return JsonResponse(TaskSerializer(task).data, status=201)
+
+
+async def task_detail_view(request, pk):
+    """
+    Retrieve one task through the shared task cache
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+
+    def load():
+        try:
+            return TaskSerializer(Task.objects.get(pk=pk)).data
+        except Task.DoesNotExist:
+            raise Http404
+
+    try:
+        data = await sync_to_async(get_task_representation)(pk, load)
+    except Http404:
+        return JsonResponse({'detail': 'No Task matches the given query.'}, status=404)
+    return JsonResponse(data)
+
+
+async def email_log_list_view(request):
+    """
+    List email logs (keyset paginated)
+    """
+    return await _keyset_page(
+        request, EmailLog.objects.all(), 'sent_at', EMAIL_LOG_VALUES,
+        filter_fields=('success', 'recipient'),
+        range_fields=('sent_at',)
+    )
+
+
+@csrf_exempt
+@async_idempotent('send-email')
+async def send_email_view(request):
+    """
+    Queue an email notification through the outbox
+    """
+    if request.method != 'POST':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+
+    user = await request.auser()
+    if user.is_authenticated:
+        rejected = _csrf_failure(request)
+        if rejected is not None:
+            return rejected
+
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({'detail': 'JSON parse error'}, status=400)
+    serializer = EmailNotificationSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    task_id = await sync_to_async(enqueue)(
+        send_email_notification,
+        serializer.validated_data['recipient'],
+        serializer.validated_data['subject'],
+        serializer.validated_data['message']
+    )
+    return JsonResponse({
+        'message': 'Email queued for sending',
+        'task_id': task_id
+    }, status=202)
+
+
+async def _task_event_stream(task_ids, statuses, duration):
+    deadline = time.monotonic() + duration
+    async with get_event_bus().subscribe() as subscription:
+        yield f"retry: {EVENT_STREAM_RETRY_MS}\n\n"
+
+        # Read current state only once subscribed, so no transition can fall
+        # between the snapshot and the live events
+        if task_ids:
+            async for task_id, status in Task.objects.filter(pk__in=task_ids).values_list('id', 'status'):
+                yield format_event('snapshot', {'task_id': task_id, 'status': status})
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            event = await subscription.get(min(settings.TASK_EVENTS_HEARTBEAT_SECONDS, remaining))
+            if event is None:
+                yield ": keepalive\n\n"
+            elif (not task_ids or event['task_id'] in task_ids) and (not statuses or event['status'] in statuses):
+                yield format_event('status', event)
+
+
+async def task_events_view(request):
+    """
+    Server-Sent Events stream of task status transitions.
+
+    ``?task_id=`` (comma-separated) watches specific tasks and first sends a
+    ``snapshot`` event with each one's current status; ``?status=`` only
+    forwards transitions into the given statuses. The stream ends after
+    TASK_EVENTS_MAX_SECONDS, or a shorter ``?timeout=``, and EventSource
+    clients then reconnect.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+
+    try:
+        filters = parse_filters(Task, request.GET, ('status',))
+    except ValueError as e:
+        return JsonResponse(e.args[0], status=400)
+    try:
+        task_ids = {int(pk) for pk in request.GET.get('task_id', '').split(',') if pk}
+    except ValueError:
+        return JsonResponse({'task_id': ['Enter a comma-separated list of task ids.']}, status=400)
+    if len(task_ids) > settings.TASK_EVENTS_MAX_TASKS:
+        return JsonResponse(
+            {'task_id': [f'Watch at most {settings.TASK_EVENTS_MAX_TASKS} tasks per stream.']}, status=400
+        )
+    try:
+        duration = float(request.GET.get('timeout', settings.TASK_EVENTS_MAX_SECONDS))
+    except ValueError:
+        return JsonResponse({'timeout': ['A valid number is required.']}, status=400)
+    # nan would compare false against the deadline and never end the stream
+    if not math.isfinite(duration) or duration < 0:
+        return JsonResponse({'timeout': ['Enter a non-negative number of seconds.']}, status=400)
+    duration = min(duration, settings.TASK_EVENTS_MAX_SECONDS)
+
+    response = StreamingHttpResponse(
+        _task_event_stream(task_ids, set(filters.get('status__in', ())), duration),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop reverse proxies (e.g. nginx) from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
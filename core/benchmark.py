@@ -0,0 +1,196 @@
+"""
+In-process throughput benchmarks for the core API routes.
+
+Each scenario drives one route in ``core/urls.py`` through the Django test
+client against a seeded dataset and reports requests per second plus
+p50/p95/p99 latency. Results can be saved as a baseline and later runs
+compared against it (see ``python manage.py benchmark``).
+"""
+import json
+import math
+import time
+import random
+import uuid
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Task, EmailLog
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class Scenario:
+    """
+    One request shape against one named route
+    """
+
+    def __init__(self, name, route, method='get', kwargs=None, params=None, payload=None):
+        self.name = name
+        self.route = route
+        self.method = method
+        self.kwargs = kwargs
+        self.params = params
+        self.payload = payload
+
+    def request(self, client, dataset):
+        kwargs = self.kwargs(dataset) if callable(self.kwargs) else self.kwargs
+        url = reverse(f'core:{self.route}', kwargs=kwargs)
+        if self.method == 'get':
+            params = self.params(dataset) if callable(self.params) else self.params
+            return client.get(url, params or {})
+        payload = self.payload() if callable(self.payload) else self.payload
+        return client.post(url, json.dumps(payload), content_type='application/json')
+
+
+def _random_task(dataset):
+    return {'pk': random.choice(dataset['task_ids'])}
+
+
+def _watch_random_task(dataset):
+    # A zero timeout ends the event stream right after its snapshot
+    return {'task_id': random.choice(dataset['task_ids']), 'timeout': 0}
+
+
+def _result_lookup_payload():
+    return {'task_ids': [str(uuid.uuid4()) for _ in range(100)]}
+
+
+def _task_payload():
+    return {'title': 'Benchmark task', 'description': 'Created by the benchmark suite'}
+
+
+def _email_payload():
+    return {'recipient': 'bench@example.com', 'subject': 'Benchmark', 'message': 'Benchmark message'}
+
+
+SCENARIOS = [
+    Scenario('task-list', 'task-list-create'),
+    Scenario('task-list-cursor', 'task-list-create', params={'pagination': 'cursor'}),
+    Scenario('task-detail', 'task-detail', kwargs=_random_task),
+    Scenario('task-create', 'task-list-create', method='post', payload=_task_payload),
+    Scenario('task-bulk-create', 'task-bulk-create', method='post', payload=lambda: [_task_payload()] * 50),
+    Scenario('task-stats', 'task-stats'),
+    Scenario('task-export', 'task-export', params={'format': 'ndjson'}),
+    Scenario('email-log-list', 'email-log-list'),
+    Scenario('email-log-export', 'email-log-export', params={'format': 'csv'}),
+    Scenario('send-email', 'send-email', method='post', payload=_email_payload),
+    Scenario('task-results', 'task-results', method='post', payload=_result_lookup_payload),
+    Scenario('health', 'health-check'),
+    Scenario('async-task-list', 'async-task-list-create'),
+    Scenario('async-task-events', 'async-task-events', params=_watch_random_task),
+    Scenario('async-task-detail', 'async-task-detail', kwargs=_random_task),
+    Scenario('async-task-create', 'async-task-list-create', method='post', payload=_task_payload),
+    Scenario('async-email-log-list', 'async-email-log-list'),
+    Scenario('async-send-email', 'async-send-email', method='post', payload=_email_payload),
+]
+
+
+def seed(tasks, email_logs):
+    """
+    Insert ``tasks`` tasks and ``email_logs`` email logs and return the
+    dataset description the scenarios draw from
+    """
+    statuses = [choice for choice, _ in Task.TASK_STATUS_CHOICES]
+    Task.objects.bulk_create(
+        [Task(title=f'Seed task {i}', description=f'Seeded benchmark task {i}', status=statuses[i % len(statuses)])
+         for i in range(tasks)],
+        batch_size=1000
+    )
+    now = timezone.now()
+    EmailLog.objects.bulk_create(
+        [EmailLog(recipient=f'user{i}@example.com', subject=f'Seed email {i}', message='Seeded benchmark email',
+                  sent_at=now - timedelta(minutes=i), success=i % 10 != 0)
+         for i in range(email_logs)],
+        batch_size=1000
+    )
+    return {
+        'tasks': tasks,
+        'email_logs': email_logs,
+        'task_ids': list(Task.objects.values_list('id', flat=True)),
+    }
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    index = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def _drain(response):
+    if response.is_async:
+        async def consume():
+            async for _ in response.streaming_content:
+                pass
+
+        async_to_sync(consume)()
+    else:
+        for _ in response.streaming_content:
+            pass
+
+
+def run_scenario(client, scenario, dataset, requests, warmup=5):
+    latencies = []
+    # Requests are issued back to back, so throughput is the inverse of the
+    # mean latency of a single client
+    for iteration in range(warmup + requests):
+        started = time.perf_counter()
+        response = scenario.request(client, dataset)
+        if response.streaming:
+            _drain(response)
+        elapsed = time.perf_counter() - started
+
+        if response.status_code >= 400:
+            raise BenchmarkError(f"{scenario.name} returned HTTP {response.status_code}")
+        if iteration >= warmup:
+            latencies.append(elapsed)
+    return summarize(latencies, sum(latencies))
+
+
+def run_benchmarks(client, dataset, requests, warmup=5, scenarios=None, only=None):
+    """
+    Run every scenario (or those named in ``only``) and return
+    ``{scenario name: summary}``
+    """
+    results = {}
+    for scenario in scenarios or SCENARIOS:
+        if only and scenario.name not in only:
+            continue
+        results[scenario.name] = run_scenario(client, scenario, dataset, requests, warmup)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Return a description of every scenario whose p95 latency rose, or
+    whose throughput fell, by more than ``threshold`` (a fraction) against
+    ``baseline``. p99 is reported but not gated; it is too noisy for short
+    runs.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.2f}ms -> {result['p95_ms']:.2f}ms")
+        if result['rps'] < previous['rps'] * (1 - threshold):
+            regressions.append(f"{name}: {previous['rps']:.0f} req/s -> {result['rps']:.0f} req/s")
+    return regressions
@@ -0,0 +1,82 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Bump when the cached TaskSerializer representation changes shape
+TASK_CACHE_VERSION = 1
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _version_key(pk):
+    return f"core:task:{pk}:generation"
+
+
+def _data_key(pk, generation):
+    return f"core:task:{pk}:{generation}"
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def _current_generation(pk):
+    """
+    Return the cache generation for a task, starting a fresh one if needed.
+
+    A fresh generation is time based rather than 1 so that it can never
+    collide with data cached under a generation whose key was evicted.
+    """
+    key = _version_key(pk)
+    generation = cache.get(key, version=TASK_CACHE_VERSION)
+    if generation is None:
+        cache.add(key, time.time_ns(), timeout=None, version=TASK_CACHE_VERSION)
+        generation = cache.get(key, version=TASK_CACHE_VERSION)
+    return generation
+
+
+def get_task_representation(pk, loader):
+    """
+    Read-through cache for a serialized task.
+
+    ``loader`` is called on a miss and must return the serialized task (or
+    raise, e.g. Http404, in which case nothing is cached). Data is stored
+    under the task's current generation, so a writer that invalidates while a
+    reader is still loading only orphans the stale entry. With
+    TASK_CACHE_TIMEOUT = 0 every read goes to ``loader``.
+    """
+    if not settings.TASK_CACHE_TIMEOUT:
+        return dict(loader())
+
+    generation = _current_generation(pk)
+    key = _data_key(pk, generation)
+
+    data = cache.get(key, version=TASK_CACHE_VERSION)
+    if data is not None:
+        _record('hits')
+        return data
+
+    _record('misses')
+    data = dict(loader())
+    cache.set(key, data, settings.TASK_CACHE_TIMEOUT, version=TASK_CACHE_VERSION)
+    return data
+
+
+def invalidate_tasks(*pks):
+    """
+    Drop the cached representation of every given task in one round trip
+    """
+    if pks:
+        cache.delete_many([_version_key(pk) for pk in pks], version=TASK_CACHE_VERSION)
+
+
+def task_cache_stats():
+    """
+    Return this process's task cache hit/miss counters
+    """
+    with _stats_lock:
+        return dict(_stats)
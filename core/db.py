@@ -0,0 +1,36 @@
+import os
+
+from django.db import connections
+
+
+# Django keeps its psycopg pools in the private class attribute
+# DatabaseWrapper._connection_pools (Django 5.1+, postgresql backend only).
+# Both helpers read it with getattr so a backend or release without it
+# degrades to "no pool" instead of failing; recheck it on Django upgrades.
+def connection_pool(alias):
+    """
+    The psycopg connection pool Django keeps for ``alias``, or None when
+    that database is not pooled (or the pool has not been created yet)
+    """
+    pools = getattr(type(connections[alias]), '_connection_pools', None)
+    return pools.get(alias) if pools else None
+
+
+def forget_inherited_connections():
+    """
+    Drop, without closing, the database connections and pools a forked
+    child inherited from its parent.
+
+    Closing them would send a terminate message on sockets the parent is
+    still using, and a pool's worker threads do not survive the fork. The
+    child opens its own connection (or pool) on first use.
+    """
+    for conn in connections.all(initialized_only=True):
+        pools = getattr(type(conn), '_connection_pools', None)
+        if pools:
+            pools.pop(conn.alias, None)
+        conn.connection = None
+
+
+# Covers Celery prefork children and gunicorn --preload workers alike
+os.register_at_fork(after_in_child=forget_inherited_connections)
@@ -0,0 +1,135 @@
+"""
+Task status events for streaming to clients.
+
+Every committed status transition is published to an event bus: Redis
+pub/sub when TASK_EVENTS_URL is set, so web processes see transitions made
+by Celery workers, otherwise an in-process bus that only reaches
+subscribers in the publishing process (development and tests).
+"""
+import asyncio
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager
+
+import redis
+import redis.asyncio
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TASK_EVENTS_CHANNEL = 'core:task-events'
+
+
+class LocalEventBus:
+    """
+    In-process bus delivering events to per-subscriber asyncio queues
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for entry in subscribers:
+            loop, queue = entry
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # The subscriber's event loop has closed
+                with self._lock:
+                    self._subscribers.discard(entry)
+
+    @asynccontextmanager
+    async def subscribe(self):
+        queue = asyncio.Queue()
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.add(entry)
+        try:
+            yield _LocalSubscription(queue)
+        finally:
+            with self._lock:
+                self._subscribers.discard(entry)
+
+
+class _LocalSubscription:
+    def __init__(self, queue):
+        self.queue = queue
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class RedisEventBus:
+    """
+    Redis pub/sub bus on a single channel; subscribers filter what they need
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self._client = None
+
+    def publish(self, event):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        self._client.publish(TASK_EVENTS_CHANNEL, json.dumps(event))
+
+    @asynccontextmanager
+    async def subscribe(self):
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(TASK_EVENTS_CHANNEL)
+            yield _RedisSubscription(pubsub)
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+class _RedisSubscription:
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        return json.loads(message['data'])
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_event_bus():
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            url = settings.TASK_EVENTS_URL
+            _bus = RedisEventBus(url) if url else LocalEventBus()
+        return _bus
+
+
+def publish_task_event(task_id, status, previous_status=None):
+    """
+    Publish a task status change. Delivery is best effort: a failure is
+    logged and clients fall back on the snapshot sent when they subscribe.
+    """
+    event = {'task_id': task_id, 'status': status, 'previous_status': previous_status}
+    try:
+        get_event_bus().publish(event)
+    except Exception as e:
+        logger.warning(f"Failed to publish status event for task {task_id}: {str(e)}")
+
+
+def format_event(event, data):
+    """
+    Encode one Server-Sent Events message
+    """
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
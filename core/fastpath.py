@@ -0,0 +1,69 @@
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .profiling import timed_serialization
+
+# Fields whose representation of a database value is the value itself
+_PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class ValuesSerializer:
+    """
+    Read-only serializer over ``.values()`` rows that produces the same
+    representation as ``serializer_class`` without building model
+    instances.
+
+    Columns and per-field conversions are derived from the
+    ModelSerializer's own fields: plain values pass through, and anything
+    else (e.g. datetimes) goes through that field's ``to_representation``.
+    Only flat, non-method fields are supported.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.fields = []
+        for name, field in serializer_class().fields.items():
+            if field.source == '*' or '.' in field.source or isinstance(field, serializers.SerializerMethodField):
+                raise ValueError(f"{serializer_class.__name__}.{name} cannot be read from values()")
+            convert = None if isinstance(field, _PASSTHROUGH_FIELDS) else field.to_representation
+            self.fields.append((name, field.source, convert))
+
+    @property
+    def columns(self):
+        return [source for _, source, _ in self.fields]
+
+    def to_representation(self, row):
+        data = {}
+        for name, source, convert in self.fields:
+            value = row[source]
+            data[name] = value if convert is None or value is None else convert(value)
+        return data
+
+    def serialize(self, rows):
+        # Evaluate a queryset first, so its query is not timed as serialization
+        rows = list(rows)
+        with timed_serialization():
+            return [self.to_representation(row) for row in rows]
+
+
+class ValuesListMixin:
+    """
+    Serve ``list()`` from ``.values()`` rows through a ValuesSerializer.
+
+    Filtering, ordering and pagination (page number or cursor) run on the
+    values queryset exactly as they would on model instances.
+    """
+    values_serializer = None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).values(*self.values_serializer.columns)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.values_serializer.serialize(page))
+        return Response(self.values_serializer.serialize(queryset))
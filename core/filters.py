@@ -0,0 +1,91 @@
+from django.core.exceptions import ValidationError as ModelValidationError
+from django.db import models
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .exports import parse_bound
+
+
+def parse_filters(model, params, exact_fields=(), range_fields=()):
+    """
+    Build filter kwargs for ``model`` from query parameters.
+
+    Each name in ``exact_fields`` is matched exactly after conversion by the
+    model field; for fields with choices a comma-separated list matches any
+    of them. Each datetime field in ``range_fields`` accepts
+    ``<field>_after`` and ``<field>_before`` bounds as ISO dates or
+    datetimes (a bare ``_before`` date includes the whole day). Raises
+    ValueError with a parameter-keyed error dict on bad input.
+    """
+    filters = {}
+    errors = {}
+
+    for name in exact_fields:
+        value = params.get(name)
+        if value in (None, ''):
+            continue
+        field = model._meta.get_field(name)
+        try:
+            if field.choices:
+                values = [field.to_python(item) for item in value.split(',')]
+                valid = {choice for choice, _ in field.flatchoices}
+                invalid = [item for item in values if item not in valid]
+                if invalid:
+                    raise ModelValidationError(f"Select a valid choice. {invalid[0]} is not one of the available choices.")
+                filters[f'{name}__in'] = values
+            elif isinstance(field, models.BooleanField):
+                # Accept true/false in any case, as JSON clients send them
+                filters[name] = field.to_python(value.capitalize())
+            else:
+                filters[name] = field.to_python(value)
+        except ModelValidationError as e:
+            errors[name] = e.messages
+
+    for name in range_fields:
+        for suffix, lookup, end_of_day in (('after', 'gte', False), ('before', 'lte', True)):
+            param = f'{name}_{suffix}'
+            value = params.get(param)
+            if not value:
+                continue
+            try:
+                filters[f'{name}__{lookup}'] = parse_bound(value, end_of_day)
+            except ValueError:
+                errors[param] = ['Enter a valid ISO 8601 date or datetime.']
+
+    if errors:
+        raise ValueError(errors)
+    return filters
+
+
+class FieldFilter(BaseFilterBackend):
+    """
+    Exact and date-range query parameter filtering, driven by the view's
+    ``filter_fields`` and ``filter_range_fields``
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        try:
+            filters = parse_filters(
+                queryset.model,
+                request.query_params,
+                getattr(view, 'filter_fields', ()),
+                getattr(view, 'filter_range_fields', ())
+            )
+        except ValueError as e:
+            raise ValidationError(e.args[0])
+        return queryset.filter(**filters)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = [
+            {'name': name, 'required': False, 'in': 'query', 'schema': {'type': 'string'}}
+            for name in getattr(view, 'filter_fields', ())
+        ]
+        for name in getattr(view, 'filter_range_fields', ()):
+            for suffix in ('after', 'before'):
+                parameters.append({
+                    'name': f'{name}_{suffix}',
+                    'required': False,
+                    'in': 'query',
+                    'schema': {'type': 'string', 'format': 'date-time'},
+                })
+        return parameters
@@ -0,0 +1,116 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import redis
+from redis.backoff import NoBackoff
+from redis.retry import Retry
+from celery import current_app
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='health-check')
+_lock = threading.Lock()
+_cached = {'result': None, 'expires': 0.0}
+_redis_client = None
+
+
+def _get_redis_client():
+    global _redis_client
+    if _redis_client is None:
+        timeout = settings.HEALTH_CHECK_TIMEOUT
+        _redis_client = redis.Redis.from_url(
+            settings.CELERY_BROKER_URL,
+            socket_connect_timeout=timeout,
+            socket_timeout=timeout,
+            retry=Retry(NoBackoff(), 0)
+        )
+    return _redis_client
+
+
+def _timed(check):
+    started = time.monotonic()
+    try:
+        check()
+        status = 'healthy'
+    except Exception as e:
+        logger.warning(f"Health check {check.__name__} failed: {str(e)}")
+        status = 'unhealthy'
+    return status, round((time.monotonic() - started) * 1000, 2)
+
+
+def check_database():
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    finally:
+        # Runs on a pool thread, outside any request cycle: keep the
+        # connection only as long as CONN_MAX_AGE allows
+        connection.close_if_unusable_or_obsolete()
+
+
+def check_redis():
+    _get_redis_client().ping()
+
+
+def check_celery(redis_future):
+    def ping_workers():
+        # Without a reachable broker the ping would only sit out its retries
+        if redis_future.result()[0] != 'healthy':
+            raise ConnectionError('broker unreachable')
+        if not current_app.control.ping(timeout=settings.HEALTH_CHECK_TIMEOUT):
+            raise ConnectionError('no worker replied')
+    return _timed(ping_workers)
+
+
+def run_checks():
+    """
+    Run the database, Redis and worker checks in parallel.
+
+    Each dependency reports 'healthy', 'unhealthy' or 'timeout' plus its
+    latency. The worker ping waits for the Redis result, so the whole run is
+    bounded by twice HEALTH_CHECK_TIMEOUT.
+    """
+    redis_future = _executor.submit(_timed, check_redis)
+    futures = {
+        'database': _executor.submit(_timed, check_database),
+        'redis': redis_future,
+        'celery': _executor.submit(check_celery, redis_future),
+    }
+
+    deadline = time.monotonic() + settings.HEALTH_CHECK_TIMEOUT * 2
+    result = {'latency_ms': {}}
+    for name, future in futures.items():
+        try:
+            status, latency = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except TimeoutError:
+            status, latency = 'timeout', None
+        result[name] = status
+        result['latency_ms'][name] = latency
+
+    healthy = all(result[name] == 'healthy' for name in futures)
+    result['status'] = 'healthy' if healthy else 'unhealthy'
+    return result
+
+
+def get_health():
+    """
+    Return the latest health result, re-running checks at most once every
+    HEALTH_CHECK_CACHE_SECONDS per process so frequent probes are free
+    """
+    now = time.monotonic()
+    if _cached['result'] is not None and now < _cached['expires']:
+        return dict(_cached['result'], cached=True)
+
+    with _lock:
+        # Another probe may have refreshed the result while we waited
+        if _cached['result'] is not None and time.monotonic() < _cached['expires']:
+            return dict(_cached['result'], cached=True)
+
+        result = run_checks()
+        _cached['result'] = result
+        _cached['expires'] = time.monotonic() + settings.HEALTH_CHECK_CACHE_SECONDS
+        return dict(result, cached=False)
@@ -0,0 +1,131 @@
+"""
+``Idempotency-Key`` support for POST endpoints that create work.
+
+The first request with a key claims it in the cache (Redis in production)
+and a successful response is stored for IDEMPOTENCY_KEY_TTL seconds; a
+retry with the same key and body gets that response replayed instead of
+creating another task or email. Error responses release the key, so a
+corrected or later retry runs normally. A retry that arrives while the
+original is still running gets 409, and reusing a key for a different
+body gets 422. Keys are scoped per endpoint and per user, so anonymous
+clients should use random keys (e.g. UUIDs).
+"""
+import hashlib
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+_IN_FLIGHT = 'in_flight'
+_DONE = 'done'
+
+
+class _Replay:
+    def __init__(self, status, data, headers=None):
+        self.status = status
+        self.data = data
+        self.headers = headers or {}
+
+
+def _cache_key(scope, user, key):
+    owner = user.pk if user is not None and user.is_authenticated else 'anonymous'
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f"core:idempotency:{scope}:{owner}:{digest}"
+
+
+def _begin(scope, user, key, body):
+    """
+    Claim ``key`` for this request. Returns ``(cache_key, fingerprint)`` to
+    proceed with, or a _Replay to answer with instead.
+    """
+    if len(key) > MAX_KEY_LENGTH:
+        return _Replay(400, {IDEMPOTENCY_HEADER: [f'Ensure this header has no more than {MAX_KEY_LENGTH} characters.']})
+
+    cache_key = _cache_key(scope, user, key)
+    fingerprint = hashlib.sha256(body).hexdigest()
+    if cache.add(cache_key, {'state': _IN_FLIGHT, 'fingerprint': fingerprint}, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+        return cache_key, fingerprint
+
+    record = cache.get(cache_key)
+    if record is not None and record['fingerprint'] != fingerprint:
+        return _Replay(422, {'detail': f'{IDEMPOTENCY_HEADER} was already used with a different request body.'})
+    if record is None or record['state'] == _IN_FLIGHT:
+        return _Replay(
+            409,
+            {'detail': f'A request with this {IDEMPOTENCY_HEADER} is still being processed.'},
+            {'Retry-After': '1'}
+        )
+    return _Replay(record['status'], record['data'], {'Idempotent-Replayed': 'true'})
+
+
+def _finish(cache_key, fingerprint, status, data):
+    if status >= 400:
+        # Nothing was created; let the client's retry run the request again
+        cache.delete(cache_key)
+        return
+    cache.set(
+        cache_key,
+        {'state': _DONE, 'fingerprint': fingerprint, 'status': status, 'data': data},
+        settings.IDEMPOTENCY_KEY_TTL
+    )
+
+
+def idempotent(scope):
+    """
+    Decorate a DRF view function (or, via method_decorator, a view method)
+    whose responses are DRF Responses
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key or request.method != 'POST':
+                return view(request, *args, **kwargs)
+
+            outcome = _begin(scope, request.user, key, request.body)
+            if isinstance(outcome, _Replay):
+                return Response(outcome.data, status=outcome.status, headers=outcome.headers)
+
+            try:
+                response = view(request, *args, **kwargs)
+            except BaseException:
+                cache.delete(outcome[0])
+                raise
+            _finish(*outcome, response.status_code, response.data)
+            return response
+        return wrapper
+    return decorator
+
+
+def async_idempotent(scope):
+    """
+    Decorate an async view whose responses are JsonResponses
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key or request.method != 'POST':
+                return await view(request, *args, **kwargs)
+
+            user = await request.auser()
+            outcome = await sync_to_async(_begin)(scope, user, key, request.body)
+            if isinstance(outcome, _Replay):
+                return JsonResponse(outcome.data, status=outcome.status, headers=outcome.headers)
+
+            try:
+                response = await view(request, *args, **kwargs)
+            except BaseException:
+                await sync_to_async(cache.delete)(outcome[0])
+                raise
+            await sync_to_async(_finish)(*outcome, response.status_code, json.loads(response.content))
+            return response
+        return wrapper
+    return decorator
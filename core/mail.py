@@ -0,0 +1,231 @@
+import os
+import smtplib
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from queue import LifoQueue, Empty, Full
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import connections, transaction
+
+from .models import EmailLog
+
+logger = logging.getLogger(__name__)
+
+
+class EmailConnectionPool:
+    """
+    Per-process pool of open email backend connections.
+
+    Connections are reused across Celery tasks so the SMTP handshake and TLS
+    negotiation are paid once per connection instead of once per message.
+    Every checkout health-checks the connection (an SMTP NOOP) and replaces
+    it if the server dropped it; connections older than EMAIL_POOL_MAX_AGE
+    seconds are recycled. A forked child never reuses its parent's sockets.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._idle = LifoQueue()
+
+    @property
+    def max_size(self):
+        return settings.EMAIL_POOL_SIZE
+
+    @property
+    def max_age(self):
+        return settings.EMAIL_POOL_MAX_AGE
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out an open connection, returning it to the pool afterwards
+        """
+        conn, opened_at = self._checkout()
+        try:
+            yield conn
+        except Exception:
+            self._discard(conn)
+            raise
+        else:
+            self._checkin(conn, opened_at)
+
+    def send_messages(self, messages):
+        """
+        Send messages on a pooled connection, reconnecting once if the
+        server closed the connection between the health check and the send
+        """
+        try:
+            with self.connection() as conn:
+                return conn.send_messages(messages)
+        except smtplib.SMTPServerDisconnected:
+            logger.warning("SMTP connection dropped during send, reconnecting")
+            with self.connection() as conn:
+                return conn.send_messages(messages)
+
+    def close_all(self):
+        """
+        Close every idle connection, e.g. at worker shutdown
+        """
+        self._reset_after_fork()
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except Empty:
+                break
+            self._discard(conn)
+
+    def _checkout(self):
+        self._reset_after_fork()
+        while True:
+            try:
+                conn, opened_at = self._idle.get_nowait()
+            except Empty:
+                break
+            if time.monotonic() - opened_at > self.max_age or not self._is_usable(conn):
+                self._discard(conn)
+                continue
+            return conn, opened_at
+
+        conn = get_connection(fail_silently=False)
+        conn.open()
+        return conn, time.monotonic()
+
+    def _checkin(self, conn, opened_at):
+        try:
+            if self._idle.qsize() >= self.max_size:
+                raise Full
+            self._idle.put_nowait((conn, opened_at))
+        except Full:
+            self._discard(conn)
+
+    def _is_usable(self, conn):
+        # Non-SMTP backends (console, locmem, ...) have nothing to check
+        if not hasattr(conn, 'connection'):
+            return True
+        if conn.connection is None:
+            return False
+        try:
+            return conn.connection.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception as e:
+            logger.debug(f"Error closing email connection: {str(e)}")
+
+    def _reset_after_fork(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # The inherited sockets belong to the parent process; drop
+                # them without sending QUIT on the parent's session
+                self._idle = LifoQueue()
+                self._pid = os.getpid()
+
+
+class EmailLogWriter:
+    """
+    Buffer EmailLog outcomes in the worker and persist them in bulk.
+
+    Logs without a primary key are inserted with one bulk_create; logs that
+    were pre-inserted only get their outcome columns written, with one
+    bulk_update on ``success`` and ``error_message``. The buffer is flushed
+    when it holds EMAIL_LOG_BUFFER_SIZE logs, EMAIL_LOG_FLUSH_INTERVAL
+    seconds after the oldest log was added, and at worker shutdown. A
+    failed flush keeps its logs and retries on the next interval; while the
+    database stays down the buffer keeps at most EMAIL_LOG_MAX_BUFFER logs,
+    dropping the oldest.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._pending = []
+        self._timer = None
+
+    def add(self, *email_logs):
+        with self._lock:
+            self._reset_after_fork()
+            self._pending.extend(email_logs)
+            flush_now = len(self._pending) >= settings.EMAIL_LOG_BUFFER_SIZE
+            if not flush_now:
+                self._arm_timer()
+
+        if flush_now:
+            self.flush()
+
+    def flush(self):
+        """
+        Write every buffered log, returning how many were persisted
+        """
+        with self._lock:
+            self._reset_after_fork()
+            pending, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        if not pending:
+            return 0
+
+        new_logs = [email_log for email_log in pending if email_log.pk is None]
+        existing_logs = [email_log for email_log in pending if email_log.pk is not None]
+        try:
+            with transaction.atomic():
+                if new_logs:
+                    EmailLog.objects.bulk_create(new_logs)
+                if existing_logs:
+                    EmailLog.objects.bulk_update(existing_logs, ['success', 'error_message'])
+        except Exception as e:
+            # Keep the outcomes for the next flush rather than losing them;
+            # any inserts were rolled back along with the transaction
+            logger.error(f"Failed to flush {len(pending)} email logs: {str(e)}")
+            for email_log in new_logs:
+                email_log.pk = None
+                email_log._state.adding = True
+            with self._lock:
+                self._pending[:0] = pending
+                overflow = len(self._pending) - settings.EMAIL_LOG_MAX_BUFFER
+                if overflow > 0:
+                    logger.error(f"Email log buffer full, dropping the {overflow} oldest logs")
+                    del self._pending[:overflow]
+                # Retry even if no further log is added
+                self._arm_timer()
+            return 0
+
+        logger.debug(f"Flushed {len(pending)} email logs")
+        return len(pending)
+
+    def _arm_timer(self):
+        # Called with the lock held
+        if self._timer is None:
+            self._timer = threading.Timer(settings.EMAIL_LOG_FLUSH_INTERVAL, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            # Timer threads own their database connection
+            connections.close_all()
+
+    def _reset_after_fork(self):
+        if self._pid != os.getpid():
+            # Logs and timers inherited from the parent belong to the parent
+            self._pending = []
+            self._timer = None
+            self._pid = os.getpid()
+
+
+email_connection_pool = EmailConnectionPool()
+email_log_writer = EmailLogWriter()
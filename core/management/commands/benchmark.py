@@ -0,0 +1,102 @@
+import json
+from pathlib import Path
+from unittest.mock import PropertyMock, patch
+
+from celery import Celery, current_app
+from celery.backends.cache import CacheBackend
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from core.benchmark import SCENARIOS, BenchmarkError, compare, run_benchmarks, seed
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark every core API route against a seeded throwaway database '
+        'and compare with a saved baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1000, help='Tasks to seed')
+        parser.add_argument('--email-logs', type=int, default=1000, help='Email logs to seed')
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per scenario')
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=[scenario.name for scenario in SCENARIOS],
+            help='Run only this scenario (repeatable)',
+        )
+        parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help='Baseline JSON file')
+        parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.2,
+            help='Fail when p95 latency rises or req/s falls by more than this fraction',
+        )
+
+    def handle(self, *args, **options):
+        # Local stand-ins: a test database on the configured engine (SQLite,
+        # or Postgres via DATABASE_URL), locmem cache and email, eager Celery
+        # with an in-memory result backend
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        always_eager = current_app.conf.task_always_eager
+        current_app.conf.task_always_eager = True
+        try:
+            result_backend = CacheBackend(app=current_app, backend='memory')
+            with override_settings(
+                CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                # Eager Celery shares the web process, so the task cache stays coherent
+                TASK_CACHE_TIMEOUT=300,
+                QUERY_PROFILING_ENABLED=False,
+            ), patch.object(Celery, 'backend', new_callable=PropertyMock, return_value=result_backend):
+                cache.clear()
+                dataset = seed(options['tasks'], options['email_logs'])
+                results = run_benchmarks(
+                    Client(), dataset, options['requests'], options['warmup'], only=options['scenario']
+                )
+        except BenchmarkError as e:
+            raise CommandError(str(e))
+        finally:
+            current_app.conf.task_always_eager = always_eager
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.report(results)
+        dataset_info = {'engine': connection.vendor, 'tasks': options['tasks'], 'email_logs': options['email_logs']}
+
+        if options['save_baseline']:
+            options['baseline'].parent.mkdir(parents=True, exist_ok=True)
+            options['baseline'].write_text(json.dumps({'dataset': dataset_info, 'results': results}, indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {options['baseline']}"))
+            return
+
+        if not options['baseline'].exists():
+            self.stdout.write(self.style.WARNING('No baseline found; run with --save-baseline to record one'))
+            return
+
+        baseline = json.loads(options['baseline'].read_text())
+        if baseline['dataset'] != dataset_info:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline was recorded with {baseline['dataset']}, this run used {dataset_info}"
+            ))
+        regressions = compare(results, baseline['results'], options['threshold'])
+        if regressions:
+            raise CommandError('Performance regressions:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"No regressions beyond {options['threshold']:.0%}"))
+
+    def report(self, results):
+        self.stdout.write(f"{'scenario':<22}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<22}{result['rps']:>10.1f}{result['p50_ms']:>10.2f}"
+                f"{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+            )
@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.outbox import relay_batch
+
+
+class Command(BaseCommand):
+    help = 'Publish pending outbox messages to the Celery broker'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the outbox once and exit instead of polling',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.OUTBOX_RELAY_BATCH_SIZE,
+            help='Messages published per batch',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.OUTBOX_RELAY_INTERVAL,
+            help='Seconds to wait after the outbox has been drained',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.stdout.write(self.style.SUCCESS(f'Relaying outbox messages in batches of {batch_size}'))
+
+        total = 0
+        while True:
+            # Long-running process: drop connections past CONN_MAX_AGE or broken
+            close_old_connections()
+            published = relay_batch(batch_size)
+            total += published
+
+            if published < batch_size:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Published {total} outbox messages'))
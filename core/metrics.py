@@ -0,0 +1,360 @@
+import os
+import math
+import time
+import logging
+import threading
+from collections import defaultdict
+
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_process_init,
+)
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.dateparse import parse_datetime
+
+from .cache import task_cache_stats
+from .db import connection_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonic counter with labels
+    """
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] += amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield self.name, tuple(zip(self.labelnames, key)), value
+
+
+class Histogram:
+    """
+    Cumulative histogram with labels, in Prometheus bucket layout
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['buckets'][index] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {key: {'buckets': list(state['buckets']), 'sum': state['sum'], 'count': state['count']}
+                      for key, state in self._values.items()}
+        for key, state in values.items():
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['buckets']):
+                cumulative += count
+                yield f'{self.name}_bucket', labels + (('le', _format_value(bound)),), cumulative
+            yield f'{self.name}_sum', labels, state['sum']
+            yield f'{self.name}_count', labels, state['count']
+
+
+class Gauge:
+    """
+    Gauge whose samples are produced by a callback at scrape time
+    """
+    type = 'gauge'
+
+    def __init__(self, name, documentation, callback):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def samples(self):
+        for labels, value in self.callback():
+            yield self.name, tuple(labels), value
+
+
+class Registry:
+    """
+    In-process metric registry rendered in the Prometheus text format
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, const_labels=()):
+        """
+        Render every metric, prefixing ``const_labels`` (e.g. the process
+        id) to each sample's labels
+        """
+        const_labels = tuple(const_labels)
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                logger.warning(f"Failed to collect metric {metric.name}: {str(e)}")
+                continue
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in samples:
+                lines.append(f'{name}{_format_labels(const_labels + tuple(labels))} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency by resolved URL name.',
+    ('route', 'method')
+))
+http_requests = registry.register(Counter(
+    'http_requests_total',
+    'HTTP responses by resolved URL name and status code.',
+    ('route', 'method', 'status')
+))
+http_db_queries = registry.register(Counter(
+    'http_request_db_queries_total',
+    'Database queries issued while serving requests.',
+    ('route',)
+))
+http_db_duration = registry.register(Counter(
+    'http_request_db_seconds_total',
+    'Time spent in database queries while serving requests.',
+    ('route',)
+))
+celery_task_runtime = registry.register(Histogram(
+    'celery_task_runtime_seconds',
+    'Celery task execution time.',
+    ('task', 'state')
+))
+celery_task_queue_wait = registry.register(Histogram(
+    'celery_task_queue_wait_seconds',
+    'Time between a Celery task being published (or its ETA) and starting.',
+    ('task',)
+))
+outbox_publish_lag = registry.register(Histogram(
+    'outbox_publish_lag_seconds',
+    'Time between an outbox message being recorded and the relay publishing it.',
+    ('task',)
+))
+registry.register(Gauge(
+    'task_cache_lookups',
+    'Task detail cache lookups in this process by outcome.',
+    lambda: [((('outcome', outcome),), count) for outcome, count in task_cache_stats().items()]
+))
+db_connections_opened = registry.register(Counter(
+    'db_connections_opened_total',
+    'Database connections opened (or checked out of a pool) by this process.',
+    ('alias', 'vendor')
+))
+
+
+def _pool_stats():
+    for alias in connections:
+        pool = connection_pool(alias)
+        if pool is not None:
+            for stat, value in pool.get_stats().items():
+                yield (('alias', alias), ('stat', stat)), value
+
+
+# psycopg_pool statistics, e.g. requests_wait_ms / requests_num is the mean
+# checkout wait and requests_waiting the current queue
+registry.register(Gauge(
+    'db_pool',
+    'Database connection pool statistics in this process.',
+    _pool_stats
+))
+
+
+class QueryRecorder:
+    """
+    connection.execute_wrapper() hook counting and timing queries
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+def record_request(route, method, status_code, duration, queries):
+    http_request_duration.observe(duration, route=route, method=method)
+    http_requests.inc(route=route, method=method, status=status_code)
+    http_db_queries.inc(queries.count, route=route)
+    http_db_duration.inc(queries.duration, route=route)
+
+
+@receiver(connection_created)
+def count_new_connection(sender, connection, **kwargs):
+    db_connections_opened.inc(alias=connection.alias, vendor=connection.vendor)
+
+
+# Celery hooks: runtime and queue wait for every task, labelled by name
+
+_task_started = {}
+
+
+@before_task_publish.connect
+def stamp_publish_time(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault('published_at', time.time())
+
+
+@task_prerun.connect
+def record_task_start(task_id=None, task=None, **kwargs):
+    now = time.time()
+    _task_started[task_id] = time.perf_counter()
+
+    published_at = getattr(task.request, 'published_at', None)
+    if published_at is None:
+        return
+    eta = task.request.eta
+    if eta:
+        eta = parse_datetime(eta) if isinstance(eta, str) else eta
+        published_at = max(published_at, eta.timestamp())
+    celery_task_queue_wait.observe(max(now - published_at, 0.0), task=task.name)
+
+
+@task_postrun.connect
+def record_task_runtime(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        celery_task_runtime.observe(time.perf_counter() - started, task=task.name, state=state or 'UNKNOWN')
+
+
+def process_labels():
+    """
+    Constant labels identifying this web process, so scrapes answered by
+    different workers never merge into one series
+    """
+    return (('pid', os.getpid()),)
+
+
+def serve_metrics(port, const_labels=()):
+    """
+    Serve this process's metrics on ``port`` from a daemon thread. Returns
+    False when the port cannot be bound.
+    """
+    from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    def app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')])
+        return [registry.render(const_labels).encode()]
+
+    try:
+        server = make_server('0.0.0.0', port, app, handler_class=QuietHandler)
+    except OSError:
+        return False
+    threading.Thread(target=server.serve_forever, name='metrics-exporter', daemon=True).start()
+    return True
+
+
+_web_exporter_lock = threading.Lock()
+_web_exporter_port = None
+
+
+def start_web_exporter():
+    """
+    Serve this web worker's metrics on the first free port from
+    WEB_METRICS_PORT, when one is configured, so each worker can be scraped
+    as its own target. Safe to call more than once per process.
+    """
+    global _web_exporter_port
+    base_port = settings.WEB_METRICS_PORT
+    if not base_port:
+        return None
+    with _web_exporter_lock:
+        if _web_exporter_port is None:
+            for port in range(base_port, base_port + settings.WEB_METRICS_MAX_WORKERS):
+                if serve_metrics(port, process_labels()):
+                    _web_exporter_port = port
+                    logger.info(f"Serving web worker metrics on port {port}")
+                    break
+            else:
+                logger.warning(f"No free metrics port in {base_port}-{base_port + settings.WEB_METRICS_MAX_WORKERS - 1}")
+        return _web_exporter_port
+
+
+@worker_process_init.connect
+def start_worker_exporter(**kwargs):
+    """
+    Serve this worker process's metrics on CELERY_METRICS_PORT plus the
+    pool process index, when a port is configured
+    """
+    base_port = settings.CELERY_METRICS_PORT
+    if not base_port:
+        return
+
+    from billiard.process import current_process
+
+    port = base_port + (getattr(current_process(), 'index', 0) or 0)
+    if not serve_metrics(port):
+        logger.warning(f"Could not start metrics exporter on port {port}")
+        return
+    logger.info(f"Serving worker metrics on port {port}")
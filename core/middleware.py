@@ -0,0 +1,122 @@
+import time
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .metrics import QueryRecorder, record_request, start_web_exporter
+from .profiling import ProfilingQueryRecorder, SerializeTimer, server_timing
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """
+    Record latency, status and database usage for every request, labelled
+    by the resolved URL name (e.g. ``core:task-list-create``).
+
+    Under ASGI, queries run by async ORM calls execute on a worker thread
+    whose connection is not wrapped, so only latency and status are
+    attributed to async views.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        # Built once per worker process when the handler loads
+        start_web_exporter()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        queries = QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, queries)
+        return response
+
+    async def __acall__(self, request):
+        queries = QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, queries)
+        return response
+
+    def record(self, request, response, duration, queries):
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else 'unresolved'
+        record_request(route, request.method, response.status_code, duration, queries)
+
+
+class QueryProfilingMiddleware:
+    """
+    Opt-in per-request query profiler (QUERY_PROFILING_ENABLED).
+
+    Adds a Server-Timing header with db, serialize (serializer work in the
+    view), render (response rendering after the view) and total durations, warns when one SQL shape repeats at least
+    QUERY_PROFILING_REPEAT_THRESHOLD times in a request (N+1), and logs
+    requests slower than QUERY_PROFILING_SLOW_REQUEST_MS with their
+    costliest query fingerprints.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.QUERY_PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        queries = ProfilingQueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries), SerializeTimer().activate() as serialize:
+            response = self.get_response(request)
+        return self.report(request, response, started, queries, serialize)
+
+    async def __acall__(self, request):
+        queries = ProfilingQueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries), SerializeTimer().activate() as serialize:
+            response = await self.get_response(request)
+        return self.report(request, response, started, queries, serialize)
+
+    def report(self, request, response, started, queries, serialize):
+        finished = time.perf_counter()
+
+        # Template/DRF responses are rendered after the view returns
+        view_finished = getattr(request, '_profiling_view_finished', finished)
+        total = finished - started
+        response['Server-Timing'] = server_timing(queries, serialize.duration, finished - view_finished, total)
+
+        path = request.get_full_path()
+        for shape, count in queries.repeated(settings.QUERY_PROFILING_REPEAT_THRESHOLD):
+            logger.warning(f"Possible N+1 on {request.method} {path}: {count}x {shape}")
+
+        if total * 1000 >= settings.QUERY_PROFILING_SLOW_REQUEST_MS:
+            details = '; '.join(
+                f"{duration * 1000:.1f}ms {queries.fingerprints[shape]}x {shape}"
+                for shape, duration in queries.slowest()
+            )
+            logger.warning(
+                f"Slow request {request.method} {path}: {total * 1000:.1f}ms, "
+                f"{queries.count} queries in {queries.duration * 1000:.1f}ms. {details}"
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        request._profiling_view_finished = time.perf_counter()
+        return response
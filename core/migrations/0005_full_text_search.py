@@ -0,0 +1,109 @@
+from django.db import migrations
+
+# (table, [(column, weight, text search config), ...])
+SEARCH_INDEXES = [
+    ('core_task', [('title', 'A', 'english'), ('description', 'B', 'english')]),
+    ('core_emaillog', [('subject', 'A', 'english'), ('recipient', 'B', 'simple')]),
+]
+
+
+def _postgres_forward(table, columns):
+    vector = ' || '.join(
+        f"setweight(to_tsvector('{config}', coalesce({{row}}{column}, '')), '{weight}')"
+        for column, weight, config in columns
+    )
+    column_list = ', '.join(column for column, _, _ in columns)
+    return [
+        f'ALTER TABLE {table} ADD COLUMN search_vector tsvector',
+        f'''CREATE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {vector.format(row='NEW.')};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql''',
+        # Only writes to the indexed columns recompute the vector, so status
+        # transitions and other narrow UPDATEs stay cheap
+        f'''CREATE TRIGGER {table}_search_vector_trigger
+BEFORE INSERT OR UPDATE OF {column_list} ON {table}
+FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()''',
+        f'UPDATE {table} SET search_vector = {vector.format(row="")}',
+        f'CREATE INDEX {table}_search_idx ON {table} USING GIN (search_vector)',
+    ]
+
+
+def _postgres_reverse(table, columns):
+    return [
+        f'DROP TRIGGER IF EXISTS {table}_search_vector_trigger ON {table}',
+        f'DROP FUNCTION IF EXISTS {table}_search_vector_update()',
+        f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector',
+    ]
+
+
+def _sqlite_forward(table, columns):
+    # External-content FTS5 table kept current by triggers. Django rebuilds
+    # SQLite tables for most field alterations, which drops these triggers;
+    # a later migration that alters these tables must recreate them.
+    fts = f'{table}_fts'
+    names = ', '.join(column for column, _, _ in columns)
+    new_values = ', '.join(f'new.{column}' for column, _, _ in columns)
+    old_values = ', '.join(f'old.{column}' for column, _, _ in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{table}', content_rowid='id', "
+        f"tokenize='porter unicode61')",
+        f'''CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN
+    INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values});
+END''',
+        f'''CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN
+    INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});
+END''',
+        f'''CREATE TRIGGER {fts}_update AFTER UPDATE OF {names} ON {table} BEGIN
+    INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});
+    INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values});
+END''',
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _sqlite_reverse(table, columns):
+    fts = f'{table}_fts'
+    return [
+        f'DROP TRIGGER IF EXISTS {fts}_insert',
+        f'DROP TRIGGER IF EXISTS {fts}_delete',
+        f'DROP TRIGGER IF EXISTS {fts}_update',
+        f'DROP TABLE IF EXISTS {fts}',
+    ]
+
+
+STATEMENTS = {
+    'postgresql': (_postgres_forward, _postgres_reverse),
+    'sqlite': (_sqlite_forward, _sqlite_reverse),
+}
+
+
+def _run(schema_editor, direction):
+    builders = STATEMENTS.get(schema_editor.connection.vendor)
+    if builders is None:
+        # Other databases search with substring matching
+        return
+    for table, columns in SEARCH_INDEXES:
+        for statement in builders[direction](table, columns):
+            schema_editor.execute(statement, params=None)
+
+
+def create_search_indexes(apps, schema_editor):
+    _run(schema_editor, 0)
+
+
+def drop_search_indexes(apps, schema_editor):
+    _run(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
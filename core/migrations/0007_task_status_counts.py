@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:59
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def seed_counts(apps, schema_editor):
+    Task = apps.get_model('core', 'Task')
+    TaskStatusCount = apps.get_model('core', 'TaskStatusCount')
+    db = schema_editor.connection.alias
+    rows = Task.objects.using(db).order_by().values('status').annotate(n=Count('pk'))
+    TaskStatusCount.objects.using(db).bulk_create(
+        TaskStatusCount(status=row['status'], count=row['n']) for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStatusCount',
+            fields=[
+                ('status', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_counts, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,60 @@
-from django.db import models
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.models import Count, F, Q
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .signals import task_status_changed
+
+
+class TaskQuerySet(models.QuerySet):
+    def transition(self, task_id, from_status, to_status):
+        """
+        Move a task to ``to_status`` with a single conditional UPDATE.
+
+        ``from_status`` may be one status or a sequence of them, tried in
+        order. Returns True when this call made the transition, and False
+        when the task does not exist or is no longer in an expected status
+        (e.g. another worker claimed it first). Only ``status`` and
+        ``updated_at`` are written, and ``task_status_changed`` is sent on
+        success.
+        """
+        if isinstance(from_status, str):
+            from_status = (from_status,)
+        for current in from_status:
+            if to_status not in Task.ALLOWED_TRANSITIONS.get(current, ()):
+                raise ValueError(f"Illegal task transition: {current} -> {to_status}")
+
+        for current in from_status:
+            # Receivers (e.g. the status counters) run in the same transaction
+            with transaction.atomic(using=self.db):
+                updated = self.filter(pk=task_id, status=current).update(
+                    status=to_status,
+                    updated_at=timezone.now()
+                )
+                if updated:
+                    task_status_changed.send(
+                        sender=self.model,
+                        task_id=task_id,
+                        from_status=current,
+                        to_status=to_status
+                    )
+                    return True
+        return False
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        bulk_create() that also counts the new tasks in TaskStatusCount,
+        since it sends no post_save. Counts are skipped with
+        ``ignore_conflicts``, where the inserted rows are unknown; the
+        periodic reconciliation corrects them.
+        """
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            if not kwargs.get('ignore_conflicts'):
+                TaskStatusCount.objects.using(self.db).adjust(Counter(obj.status for obj in objs))
+        return objs
 
 
 class Task(models.Model):
@@ -10,6 +65,14 @@ class Task(models.Model):
         ('failed', 'Failed'),
     ]
 
+    # Failed tasks may be claimed again by a Celery retry
+    ALLOWED_TRANSITIONS = {
+        'pending': ('processing',),
+        # Back to pending releases the claim of a worker that died mid-run
+        'processing': ('completed', 'failed', 'pending'),
+        'failed': ('processing',),
+    }
+
     title = models.CharField(max_length=200)
     description = models.TextField()
     status = models.CharField(max_length=20, choices=TASK_STATUS_CHOICES, default='pending')
@@ -17,23 +80,129 @@ class Task(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
 
+    objects = TaskQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets post_save tell which status counter a changed status left
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', 'id'], name='core_task_created_id_idx'),
+            # Filtered list pages: equality prefix, then the list ordering
+            models.Index(fields=['status', '-created_at', 'id'], name='core_task_status_created_idx'),
+            models.Index(fields=['created_by', '-created_at', 'id'], name='core_task_owner_created_idx'),
+            models.Index(fields=['updated_at'], name='core_task_updated_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class TaskStatusCountQuerySet(models.QuerySet):
+    def adjust(self, deltas):
+        """
+        Apply ``{status: delta}`` with atomic ``count = count + delta``
+        UPDATEs, in a fixed order so concurrent writers cannot deadlock
+        """
+        for status, delta in sorted(deltas.items()):
+            if not delta:
+                continue
+            if not self.filter(status=status).update(count=F('count') + delta):
+                self.get_or_create(status=status)
+                self.filter(status=status).update(count=F('count') + delta)
+
+    def reconcile(self):
+        """
+        Reset every counter to a fresh GROUP BY over the task table and
+        return the ``{status: (old, new)}`` corrections made
+        """
+        corrections = {}
+        with transaction.atomic(using=self.db):
+            # Lock the counters so incremental updates queue behind the reset
+            current = {row.status: row.count for row in self.select_for_update().order_by('status')}
+            actual = dict(
+                Task.objects.using(self.db).order_by().values_list('status').annotate(n=Count('pk'))
+            )
+            for status in sorted(current.keys() | actual.keys()):
+                old, new = current.get(status, 0), actual.get(status, 0)
+                if old == new:
+                    continue
+                if not self.filter(status=status).update(count=new):
+                    self.create(status=status, count=new)
+                corrections[status] = (old, new)
+        return corrections
+
+
+class TaskStatusCount(models.Model):
+    """
+    Number of tasks in each status, maintained incrementally on every write
+    and reconciled periodically against the task table
+    """
+    status = models.CharField(max_length=20, primary_key=True)
+    count = models.BigIntegerField(default=0)
+
+    objects = TaskStatusCountQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.status}: {self.count}"
+
+
 class EmailLog(models.Model):
     recipient = models.EmailField()
     subject = models.CharField(max_length=255)
     message = models.TextField()
-    sent_at = models.DateTimeField(auto_now_add=True)
+    # Stamped when the log object is built, since buffered logs are
+    # inserted some time after the email was sent
+    sent_at = models.DateTimeField(default=timezone.now)
     success = models.BooleanField(default=False)
     error_message = models.TextField(blank=True, null=True)
 
     class Meta:
         ordering = ['-sent_at']
+        indexes = [
+            models.Index(fields=['-sent_at', 'id'], name='core_emaillog_sent_id_idx'),
+            models.Index(fields=['recipient', '-sent_at', 'id'], name='core_emaillog_recipient_idx'),
+            # Failures are rare, so a partial index keeps ?success=false cheap
+            models.Index(
+                fields=['-sent_at', 'id'],
+                name='core_emaillog_failed_idx',
+                condition=Q(success=False)
+            ),
+        ]
+
+    def __str__(self):
+        return f"Email to {self.recipient} - {'Success' if self.success else 'Failed'}"
+
+
+class OutboxMessage(models.Model):
+    """
+    A Celery task call recorded in the caller's transaction and published
+    to the broker later by the outbox relay
+    """
+    task_name = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    # Pre-generated so the request can hand out the Celery task id at once
+    task_id = models.CharField(max_length=36, unique=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    published_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['id'],
+                name='core_outbox_pending_idx',
+                condition=Q(published_at__isnull=True)
+            ),
+        ]
 
     def __str__(self):
-        return f"Email to {self.recipient} - {'Success' if self.success else 'Failed'}"
\ No newline at end of file
+        return f"{self.task_name}[{self.task_id}] - {'Published' if self.published_at else 'Pending'}"
@@ -0,0 +1,126 @@
+import uuid
+import logging
+
+from celery import current_app
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+
+from .metrics import outbox_publish_lag
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def _message(task, args, kwargs):
+    return OutboxMessage(
+        task_name=task.name,
+        args=list(args),
+        kwargs=kwargs,
+        task_id=str(uuid.uuid4())
+    )
+
+
+def enqueue(task, *args, **kwargs):
+    """
+    Record a call of ``task`` for the relay to publish and return its
+    Celery task id.
+
+    Call this inside the transaction that writes the rows the task will
+    read: the message is committed (or rolled back) with them, and the
+    request never waits on the broker.
+    """
+    message = _message(task, args, kwargs)
+    message.save(force_insert=True)
+    return message.task_id
+
+
+def enqueue_many(task, calls):
+    """
+    Record one call of ``task`` per ``args`` tuple in ``calls`` with a
+    single INSERT; returns the Celery task ids in order
+    """
+    messages = OutboxMessage.objects.bulk_create([_message(task, args, {}) for args in calls])
+    return [message.task_id for message in messages]
+
+
+def _broker_errors():
+    # Errors meaning the broker itself is unreachable, as opposed to this
+    # one message being unpublishable
+    return (OperationalError, *current_app.connection_for_write().connection_errors)
+
+
+def _record_failure(message, error):
+    attempts = message.attempts + 1
+    OutboxMessage.objects.filter(pk=message.pk).update(attempts=F('attempts') + 1, last_error=str(error))
+    if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        logger.error(
+            f"Outbox message {message.task_name}[{message.task_id}] parked after {attempts} "
+            f"failed attempts: {str(error)}"
+        )
+    else:
+        logger.warning(f"Outbox relay failed to publish {message.task_name}[{message.task_id}]: {str(error)}")
+
+
+def relay_batch(batch_size=None):
+    """
+    Publish up to ``batch_size`` pending messages, oldest first, over one
+    broker connection and return how many were published.
+
+    Rows are locked with SKIP LOCKED where the database supports it, so
+    several relays can run side by side. A broker connection error stops
+    the batch and everything unpublished is retried on the next call. Any
+    other failure is charged to that message, which is skipped; after
+    OUTBOX_MAX_ATTEMPTS failures it is parked (left unpublished and no
+    longer selected) so one poison row cannot hold up the rest. Delivery
+    is at-least-once: a crash between publishing and committing re-sends
+    the batch under the same task ids.
+    """
+    batch_size = batch_size or settings.OUTBOX_RELAY_BATCH_SIZE
+    broker_errors = _broker_errors()
+
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects
+            .select_for_update(skip_locked=True)
+            .filter(published_at__isnull=True, attempts__lt=settings.OUTBOX_MAX_ATTEMPTS)
+            .order_by('id')[:batch_size]
+        )
+        if not messages:
+            return 0
+
+        published = []
+        current = None
+        try:
+            with current_app.producer_or_acquire() as producer:
+                for current in messages:
+                    try:
+                        current_app.send_task(
+                            current.task_name,
+                            args=current.args,
+                            kwargs=current.kwargs,
+                            task_id=current.task_id,
+                            producer=producer,
+                            retry=False
+                        )
+                    except broker_errors:
+                        raise
+                    except Exception as e:
+                        _record_failure(current, e)
+                        continue
+                    published.append(current)
+        except broker_errors as e:
+            logger.warning(f"Outbox relay lost the broker: {str(e)}")
+            if current is not None:
+                OutboxMessage.objects.filter(pk=current.pk).update(last_error=str(e))
+
+        if published:
+            now = timezone.now()
+            OutboxMessage.objects.filter(pk__in=[message.pk for message in published]).update(published_at=now)
+            for message in published:
+                outbox_publish_lag.observe((now - message.created_at).total_seconds(), task=message.task_name)
+
+    return len(published)
+
@@ -0,0 +1,119 @@
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .metrics import QueryRecorder
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+# Set by QueryProfilingMiddleware for the duration of a profiled request
+_serialize_timer = ContextVar('serialize_timer', default=None)
+
+
+def fingerprint(sql):
+    """
+    Reduce a SQL statement to its shape: literals become ``?`` and IN
+    lists of any length collapse, so the same query with different
+    parameters maps to one fingerprint
+    """
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class ProfilingQueryRecorder(QueryRecorder):
+    """
+    QueryRecorder that also groups queries by fingerprint
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.fingerprints = Counter()
+        self.fingerprint_duration = defaultdict(float)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            shape = fingerprint(sql)
+            self.count += 1
+            self.duration += elapsed
+            self.fingerprints[shape] += 1
+            self.fingerprint_duration[shape] += elapsed
+
+    def repeated(self, threshold):
+        """
+        Fingerprints executed at least ``threshold`` times, most frequent
+        first; the usual signature of an N+1 access pattern
+        """
+        return [(shape, count) for shape, count in self.fingerprints.most_common() if count >= threshold]
+
+    def slowest(self, limit=5):
+        return sorted(self.fingerprint_duration.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+class SerializeTimer:
+    """
+    Time spent in serializers during one profiled request
+    """
+
+    def __init__(self):
+        self.duration = 0.0
+        self.depth = 0
+
+    @contextmanager
+    def activate(self):
+        token = _serialize_timer.set(self)
+        try:
+            yield self
+        finally:
+            _serialize_timer.reset(token)
+
+
+@contextmanager
+def timed_serialization():
+    """
+    Count the enclosed serializer work towards the current request's
+    serialize timing; nested calls are counted once
+    """
+    timer = _serialize_timer.get()
+    if timer is None or timer.depth:
+        yield
+        return
+    timer.depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.duration += time.perf_counter() - started
+        timer.depth -= 1
+
+
+class TimedSerializerMixin:
+    """
+    Serializer mixin reporting to_representation time to the profiler
+    """
+
+    def to_representation(self, instance):
+        with timed_serialization():
+            return super().to_representation(instance)
+
+
+def server_timing(queries, serialize, render, total):
+    """
+    Build a Server-Timing header value from durations in seconds
+    """
+    return ', '.join([
+        f'db;dur={queries.duration * 1000:.2f};desc="{queries.count} queries"',
+        f'serialize;dur={serialize * 1000:.2f}',
+        f'render;dur={render * 1000:.2f}',
+        f'total;dur={total * 1000:.2f}',
+    ])
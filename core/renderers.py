@@ -0,0 +1,45 @@
+import logging
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # optional dependency; fall back to the stdlib encoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+if orjson is None:
+    logger.warning("orjson is not installed; FastJSONRenderer falls back to the standard JSON renderer")
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson, producing the same bytes as DRF's
+    compact, UTF-8 output.
+
+    Types orjson would format differently (datetimes, dataclasses) and
+    types it does not know are handed to DRF's encoder. Requests for
+    indented output, or any non-default JSON settings, use the standard
+    renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or not (self.compact and self.ensure_ascii is False and self.strict)
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        default = encoders.JSONEncoder().default
+        ret = orjson.dumps(
+            data,
+            default=default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+        )
+        # Same escaping as JSONRenderer: U+2028/U+2029 are valid JSON but not
+        # valid in JavaScript string literals
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
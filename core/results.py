@@ -0,0 +1,44 @@
+from celery import current_app, states
+from celery.backends.base import KeyValueStoreBackend
+
+
+def _describe(task_id, meta):
+    if meta is None:
+        # Celery cannot tell unknown ids from ones still queued (or still in
+        # the outbox); both read as PENDING
+        return {'task_id': task_id, 'state': states.PENDING, 'result': None, 'date_done': None}
+    return {
+        'task_id': task_id,
+        'state': meta['status'],
+        'result': meta.get('result'),
+        'date_done': meta.get('date_done'),
+    }
+
+
+def get_task_results(task_ids):
+    """
+    Look up the state and result of many Celery tasks, in request order.
+
+    Key-value result backends (Redis, memcached) are read with a single
+    multi-get of the raw stored metadata; other backends fall back to one
+    lookup per task. Failures report the stored exception type and
+    message rather than a traceback.
+    """
+    task_ids = list(dict.fromkeys(task_ids))
+    backend = current_app.backend
+
+    if isinstance(backend, KeyValueStoreBackend):
+        keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+        values = backend.mget(keys)
+        if hasattr(values, 'get'):
+            # Some clients return a mapping of the keys that were found
+            values = [values.get(key) for key in keys]
+        return [_describe(task_id, backend.decode(value)) for task_id, value in zip(task_ids, values)]
+
+    results = []
+    for task_id in task_ids:
+        meta = dict(backend.get_task_meta(task_id))
+        if meta['status'] in states.EXCEPTION_STATES:
+            meta['result'] = backend.prepare_exception(meta['result'], 'json')
+        results.append(_describe(task_id, meta))
+    return results
@@ -0,0 +1,107 @@
+import time
+import logging
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .signals import rows_pruned, rows_pruning
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionResult:
+    """
+    Outcome of applying one retention policy
+    """
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.deleted = 0
+        self.batches = 0
+        self.elapsed = 0.0
+        self.complete = False
+
+    @property
+    def rows_per_second(self):
+        return self.deleted / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        state = 'complete' if self.complete else 'stopped at time budget'
+        return (
+            f"{self.policy}: deleted {self.deleted} rows in {self.batches} batches "
+            f"over {self.elapsed:.2f}s ({self.rows_per_second:.0f} rows/s, {state})"
+        )
+
+
+def _expired_queryset(policy):
+    model = apps.get_model(policy['model'])
+    cutoff = timezone.now() - timedelta(days=policy['days'])
+    return model._default_manager.filter(
+        **{f"{policy['date_field']}__lt": cutoff},
+        **policy.get('filters', {})
+    )
+
+
+def apply_policy(name, policy, deadline, batch_size=None, pause=None):
+    """
+    Delete the rows a policy has expired in primary-key-ranged batches.
+
+    Each batch selects the next ``batch_size`` expired primary keys and
+    deletes that key range with a single DELETE in its own short
+    transaction, so locks are held briefly and no objects are loaded for
+    cascade collection. ``rows_pruning`` is sent inside that transaction
+    just before the DELETE and ``rows_pruned`` after it, in place of
+    per-object delete signals. Stops early once ``deadline`` (a
+    time.monotonic() value) has passed.
+    """
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+    pause = settings.RETENTION_BATCH_PAUSE if pause is None else pause
+
+    result = RetentionResult(name)
+    expired = _expired_queryset(policy)
+    started = time.monotonic()
+    last_pk = None
+
+    while True:
+        if time.monotonic() >= deadline:
+            break
+
+        candidates = expired.order_by('pk')
+        if last_pk is not None:
+            candidates = candidates.filter(pk__gt=last_pk)
+        pks = list(candidates.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            result.complete = True
+            break
+
+        batch = expired.filter(pk__gte=pks[0], pk__lte=pks[-1])
+        with transaction.atomic(using=batch.db):
+            rows_pruning.send(sender=expired.model, queryset=batch)
+            result.deleted += batch._raw_delete(batch.db)
+        rows_pruned.send(sender=expired.model, pks=pks)
+
+        result.batches += 1
+        last_pk = pks[-1]
+        if len(pks) < batch_size:
+            result.complete = True
+            break
+        if pause:
+            time.sleep(pause)
+
+    result.elapsed = time.monotonic() - started
+    logger.info(f"Retention {result}")
+    return result
+
+
+def run_retention(policies=None, time_budget=None):
+    """
+    Apply every configured retention policy within one shared time budget
+    """
+    policies = settings.RETENTION_POLICIES if policies is None else policies
+    time_budget = settings.RETENTION_TIME_BUDGET if time_budget is None else time_budget
+    deadline = time.monotonic() + time_budget
+
+    return [apply_policy(name, policy, deadline) for name, policy in policies.items()]
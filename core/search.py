@@ -0,0 +1,81 @@
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+
+# Text search configuration used by the Postgres search_vector triggers
+# (see migration 0005_full_text_search)
+SEARCH_CONFIG = 'english'
+
+# Fields indexed per model, kept in step with migration 0005
+SEARCH_FIELDS = {
+    'core.Task': ('title', 'description'),
+    'core.EmailLog': ('subject', 'recipient'),
+}
+
+
+def _fts5_query(terms):
+    # Quote every term so user input cannot inject FTS5 operators; quoted
+    # terms are ANDed, and punctuation inside one (e.g. an email address)
+    # becomes a phrase
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def search(queryset, query):
+    """
+    Filter ``queryset`` to rows whose indexed fields match every term of
+    ``query``.
+
+    Postgres uses the GIN-indexed ``search_vector`` column with
+    websearch syntax (quoted phrases, ``-exclusions``, ``or``); SQLite uses
+    the ``<table>_fts`` FTS5 index. Both stem English words. Other
+    databases fall back to case-insensitive substring matching. Ordering
+    is left to the caller.
+    """
+    terms = query.split()
+    if not terms:
+        return queryset
+
+    model = queryset.model
+    table = model._meta.db_table
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchVectorField
+
+        return queryset.alias(
+            search_vector=RawSQL(f'"{table}"."search_vector"', (), output_field=SearchVectorField())
+        ).filter(search_vector=SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch'))
+
+    if vendor == 'sqlite':
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM "{table}_fts" WHERE "{table}_fts" MATCH %s',
+            (_fts5_query(terms),)
+        ))
+
+    condition = Q()
+    for term in terms:
+        term_condition = Q()
+        for field in SEARCH_FIELDS[model._meta.label]:
+            term_condition |= Q(**{f'{field}__icontains': term})
+        condition &= term_condition
+    return queryset.filter(condition)
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    ``?q=`` full-text search over the view model's indexed fields
+    """
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        return search(queryset, request.query_params.get(self.search_param, ''))
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Full-text search terms',
+            'schema': {'type': 'string'},
+        }]
@@ -1,7 +1,9 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Task, EmailLog
+from .profiling import TimedSerializerMixin
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ['id', 'title', 'description', 'status', 'created_at', 'updated_at', 'created_by']
@@ -17,7 +19,17 @@ class EmailNotificationSerializer(serializers.Serializer):
     subject = serializers.CharField(max_length=255)
     message = serializers.CharField()
 
-class EmailLogSerializer(serializers.ModelSerializer):
+class TaskResultLookupSerializer(serializers.Serializer):
+    task_ids = serializers.ListField(child=serializers.CharField(max_length=255), allow_empty=False)
+
+    def validate_task_ids(self, value):
+        if len(value) > settings.TASK_RESULT_LOOKUP_MAX_IDS:
+            raise serializers.ValidationError(
+                f"Ensure this field has no more than {settings.TASK_RESULT_LOOKUP_MAX_IDS} elements."
+            )
+        return value
+
+class EmailLogSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = EmailLog
         fields = ['id', 'recipient', 'subject', 'message', 'sent_at', 'success', 'error_message']
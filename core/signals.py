@@ -0,0 +1,87 @@
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .cache import invalidate_tasks
+
+# Sent by Task.objects.transition() after a successful status UPDATE, which
+# bypasses post_save. Arguments: sender, task_id, from_status, to_status.
+task_status_changed = Signal()
+
+# Sent by the retention engine inside the batch's transaction just before
+# its raw DELETE, while the rows can still be read. Arguments: sender,
+# queryset (the rows about to be deleted).
+rows_pruning = Signal()
+
+# Sent by the retention engine after each batch it deletes with a raw
+# DELETE, which bypasses post_delete. Arguments: sender, pks.
+rows_pruned = Signal()
+
+
+# Invalidation waits for COMMIT: dropping the cache generation earlier lets a
+# concurrent read re-cache the old row under a fresh generation. Outside a
+# transaction on_commit() runs the callback immediately.
+@receiver(post_save, sender='core.Task')
+@receiver(post_delete, sender='core.Task')
+def invalidate_task_cache_on_write(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate_tasks(pk))
+
+
+@receiver(task_status_changed)
+def invalidate_task_cache_on_transition(sender, task_id, **kwargs):
+    transaction.on_commit(lambda: invalidate_tasks(task_id))
+
+
+@receiver(rows_pruned)
+def invalidate_task_cache_on_prune(sender, pks, **kwargs):
+    if sender._meta.label == 'core.Task':
+        transaction.on_commit(lambda: invalidate_tasks(*pks))
+
+
+@receiver(task_status_changed)
+def publish_task_status_event(sender, task_id, from_status, to_status, **kwargs):
+    from .events import publish_task_event
+
+    # Subscribers re-read the task, so only announce committed transitions
+    transaction.on_commit(lambda: publish_task_event(task_id, to_status, from_status))
+
+
+def _adjust_status_counts(deltas):
+    from .models import TaskStatusCount
+
+    TaskStatusCount.objects.adjust(deltas)
+
+
+@receiver(post_save, sender='core.Task')
+def count_task_status_on_save(sender, instance, created, update_fields=None, **kwargs):
+    previous = getattr(instance, '_loaded_status', None)
+    if created:
+        _adjust_status_counts({instance.status: 1})
+    elif previous != instance.status and (update_fields is None or 'status' in update_fields):
+        if previous is None:
+            # Saved without being loaded first; let reconciliation correct it
+            return
+        _adjust_status_counts({previous: -1, instance.status: 1})
+    else:
+        return
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender='core.Task')
+def count_task_status_on_delete(sender, instance, **kwargs):
+    _adjust_status_counts({instance.status: -1})
+
+
+@receiver(task_status_changed)
+def count_task_status_on_transition(sender, from_status, to_status, **kwargs):
+    _adjust_status_counts({from_status: -1, to_status: 1})
+
+
+@receiver(rows_pruning)
+def count_task_status_on_prune(sender, queryset, **kwargs):
+    if sender._meta.label != 'core.Task':
+        return
+    rows = queryset.order_by().values('status').annotate(n=Count('pk'))
+    _adjust_status_counts({row['status']: -row['n'] for row in rows})
@@ -1,91 +1,216 @@
 from celery import shared_task
-from django.core.mail import send_mail
+from celery.signals import worker_process_shutdown, worker_shutdown
+from django.core.mail import EmailMessage
 from django.conf import settings
-from .models import Task, EmailLog
+from .mail import email_connection_pool, email_log_writer
+from .outbox import enqueue, enqueue_many
+from . import metrics  # noqa: F401  (registers the Celery metric hooks)
+from .models import Task, EmailLog, TaskStatusCount
+from .retention import run_retention
 import time
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _redelivered(request):
+    return bool((request.delivery_info or {}).get('redelivered'))
+
+
 @shared_task(bind=True)
 def process_task(self, task_id):
     """
     Background task to process a Task object
     """
-    try:
-        task = Task.objects.get(id=task_id)
-        task.status = 'processing'
-        task.save()
+    if _redelivered(self.request):
+        # The worker running this message died before acking it; release
+        # the claim it left in processing
+        Task.objects.transition(task_id, 'processing', 'pending')
+
+    # Only a retry may reclaim the run it marked failed; any other
+    # delivery of an already claimed task is a duplicate
+    claimable = ('pending', 'failed') if self.request.retries else ('pending',)
+    if not Task.objects.transition(task_id, claimable, 'processing'):
+        if not Task.objects.filter(id=task_id).exists():
+            logger.error(f"Task {task_id} not found")
+            return f"Task {task_id} not found"
+        logger.warning(f"Task {task_id} already claimed, skipping duplicate delivery")
+        return f"Task {task_id} already claimed"
 
+    try:
         # Simulate some processing time
         time.sleep(10)
 
         # Mark as completed
-        task.status = 'completed'
-        task.save()
+        if not Task.objects.transition(task_id, 'processing', 'completed'):
+            logger.warning(f"Task {task_id} left processing while it ran")
 
         logger.info(f"Task {task_id} completed successfully")
         return f"Task {task_id} completed successfully"
 
-    except Task.DoesNotExist:
-        logger.error(f"Task {task_id} not found")
-        return f"Task {task_id} not found"
     except Exception as exc:
         logger.error(f"Error processing task {task_id}: {str(exc)}")
-        task = Task.objects.get(id=task_id)
-        task.status = 'failed'
-        task.save()
+        Task.objects.transition(task_id, 'processing', 'failed')
         raise self.retry(exc=exc, countdown=60, max_retries=3)
 
 
+@shared_task(bind=True)
+def process_task_batch(self, task_ids):
+    """
+    Background task to process a chunk of tasks submitted together
+    """
+    if _redelivered(self.request):
+        # The previous run died mid-chunk; release what it had claimed
+        for task_id in task_ids:
+            Task.objects.transition(task_id, 'processing', 'pending')
+
+    failed = 0
+    for task_id in task_ids:
+        try:
+            process_task(task_id)
+        except Exception:
+            # process_task has already marked the row failed; hand it to a
+            # standalone process_task as its first retry
+            failed += 1
+            process_task.apply_async((task_id,), countdown=60, retries=1)
+
+    logger.info(f"Processed batch of {len(task_ids)} tasks ({failed} scheduled for retry)")
+    return f"Processed batch of {len(task_ids)} tasks"
+
+
+def enqueue_process_tasks(task_ids):
+    """
+    Queue processing for many tasks with one outbox message per chunk.
+
+    Call inside the transaction that created the tasks; returns the Celery
+    task ids of the queued messages.
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return []
+    if len(task_ids) == 1:
+        return [enqueue(process_task, task_ids[0])]
+
+    chunk_size = settings.TASK_BULK_DISPATCH_CHUNK_SIZE
+    return enqueue_many(
+        process_task_batch,
+        [(task_ids[start:start + chunk_size],) for start in range(0, len(task_ids), chunk_size)]
+    )
+
+
 @shared_task
 def send_email_notification(recipient, subject, message):
     """
     Background task to send email notifications
     """
-    email_log = EmailLog.objects.create(
+    email_log = EmailLog(
         recipient=recipient,
         subject=subject,
         message=message
     )
 
     try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[recipient],
-            fail_silently=False,
-        )
+        email_connection_pool.send_messages([
+            EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [recipient])
+        ])
 
         email_log.success = True
-        email_log.save()
+        email_log_writer.add(email_log)
 
         logger.info(f"Email sent successfully to {recipient}")
         return f"Email sent successfully to {recipient}"
 
     except Exception as e:
         email_log.error_message = str(e)
-        email_log.save()
+        email_log_writer.add(email_log)
 
         logger.error(f"Failed to send email to {recipient}: {str(e)}")
         raise e
 
 
+@shared_task
+def send_email_notifications_batch(notifications):
+    """
+    Background task to send several queued notifications over one pooled
+    connection, recording one EmailLog per message
+    """
+    email_logs = []
+    for notification in notifications:
+        email_log = EmailLog(
+            recipient=notification['recipient'],
+            subject=notification['subject'],
+            message=notification['message']
+        )
+        try:
+            # Each send checks the just-returned connection back out of the
+            # pool, and reconnects once if the server dropped it
+            email_connection_pool.send_messages([
+                EmailMessage(
+                    notification['subject'],
+                    notification['message'],
+                    settings.DEFAULT_FROM_EMAIL,
+                    [notification['recipient']]
+                )
+            ])
+            email_log.success = True
+        except Exception as e:
+            email_log.error_message = str(e)
+            logger.error(f"Failed to send email to {notification['recipient']}: {str(e)}")
+        email_logs.append(email_log)
+
+    email_log_writer.add(*email_logs)
+
+    sent = sum(1 for email_log in email_logs if email_log.success)
+    logger.info(f"Sent {sent} of {len(email_logs)} batched emails")
+    return f"Sent {sent} of {len(email_logs)} batched emails"
+
+
+def enqueue_email_notifications(notifications):
+    """
+    Queue many notifications (dicts of recipient, subject and message) in
+    batches of EMAIL_BATCH_SIZE.
+
+    Call inside the caller's transaction; returns the Celery task ids of
+    the queued messages.
+    """
+    notifications = list(notifications)
+    batch_size = settings.EMAIL_BATCH_SIZE
+    return enqueue_many(
+        send_email_notifications_batch,
+        [(notifications[start:start + batch_size],) for start in range(0, len(notifications), batch_size)]
+    )
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_email_connections(**kwargs):
+    """
+    Flush buffered email logs and close pooled email connections when a
+    worker process exits
+    """
+    email_log_writer.flush()
+    email_connection_pool.close_all()
+
+
 @shared_task
 def cleanup_old_tasks():
     """
-    Periodic task to clean up old completed tasks
+    Periodic task to prune expired rows under the configured retention policies
     """
-    from django.utils import timezone
-    from datetime import timedelta
+    results = run_retention()
+    deleted_count = sum(result.deleted for result in results)
 
-    cutoff_date = timezone.now() - timedelta(days=30)
-    deleted_count = Task.objects.filter(
-        status='completed',
-        updated_at__lt=cutoff_date
-    ).delete()[0]
+    logger.info(f"Cleaned up {deleted_count} old rows")
+    return f"Cleaned up {deleted_count} old rows: " + "; ".join(str(result) for result in results)
 
-    logger.info(f"Cleaned up {deleted_count} old tasks")
-    return f"Cleaned up {deleted_count} old tasks"
\ No newline at end of file
+
+@shared_task
+def reconcile_task_status_counts():
+    """
+    Periodic task to correct any drift in the incrementally maintained
+    task status counters
+    """
+    corrections = TaskStatusCount.objects.reconcile()
+    for status, (old, new) in corrections.items():
+        logger.warning(f"Task status counter for {status} drifted: {old} -> {new}")
+    return f"Reconciled {len(corrections)} task status counters"
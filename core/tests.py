@@ -1,10 +1,59 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import re
+import socket
+import urllib.request
+import smtplib
+import time
+import warnings
+from datetime import timedelta
+from decimal import Decimal
+
+from celery import Celery, current_app, states
+from celery.backends.cache import CacheBackend
+from celery.signals import task_postrun, task_prerun
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.db import DatabaseError, connection
+from django.db.models import Count
+from django.db.backends.signals import connection_created
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ModelSerializer
 from rest_framework.test import APITestCase
 from rest_framework import status
-from unittest.mock import patch
-from .models import Task, EmailLog
-from .tasks import process_task, send_email_notification
+from unittest.mock import patch, MagicMock, PropertyMock
+from . import urls as core_urls
+from .benchmark import SCENARIOS, compare, run_benchmarks, seed
+from .cache import task_cache_stats
+from .events import get_event_bus
+from .metrics import Histogram, Registry, registry, start_web_exporter
+from .pagination import EstimatedCountPaginator
+from .profiling import ProfilingQueryRecorder, fingerprint
+from .fastpath import ValuesSerializer
+from .renderers import FastJSONRenderer
+from .serializers import TaskSerializer, EmailLogSerializer
+from .mail import EmailConnectionPool, EmailLogWriter, email_log_writer
+from .models import Task, TaskStatusCount, EmailLog, OutboxMessage
+from .outbox import enqueue, relay_batch
+from .views import TaskListCreateView
+from .tasks import (
+    process_task,
+    process_task_batch,
+    enqueue_process_tasks,
+    send_email_notification,
+    send_email_notifications_batch,
+    enqueue_email_notifications,
+    cleanup_old_tasks,
+    reconcile_task_status_counts
+)
+from .retention import run_retention
 
 
 class TaskModelTest(TestCase):
@@ -26,6 +75,19 @@ class TaskModelTest(TestCase):
         """Test task string representation"""
         self.assertEqual(str(self.task), "Test Task")
 
+    def test_transition_is_conditional(self):
+        """Test only the first claim of a pending task succeeds"""
+        self.assertTrue(Task.objects.transition(self.task.id, 'pending', 'processing'))
+        self.assertFalse(Task.objects.transition(self.task.id, 'pending', 'processing'))
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "processing")
+
+    def test_transition_rejects_illegal_moves(self):
+        """Test transitions outside the state machine raise"""
+        with self.assertRaises(ValueError):
+            Task.objects.transition(self.task.id, 'pending', 'completed')
+
 
 class TaskAPITest(APITestCase):
     """Test Task API endpoints"""
@@ -44,6 +106,9 @@ class TaskAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Task.objects.count(), 1)
         self.assertEqual(Task.objects.get().title, "API Test Task")
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.task_name, 'core.tasks.process_task')
+        self.assertEqual(message.args, [response.data['id']])
 
     def test_list_tasks(self):
         """Test listing tasks via API"""
@@ -54,6 +119,45 @@ class TaskAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
 
+    def test_list_tasks_cursor_pagination(self):
+        """Test opt-in keyset pagination walks every task exactly once"""
+        for i in range(25):
+            Task.objects.create(title=f"Task {i}", description="Paged task")
+        url = reverse('core:task-list-create')
+
+        response = self.client.get(url, {'pagination': 'cursor'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        seen = [item['id'] for item in response.data['results']]
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        seen += [item['id'] for item in response.data['results']]
+
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(sorted(seen), sorted(Task.objects.values_list('id', flat=True)))
+
+    @patch('core.views.enqueue_process_tasks')
+    def test_bulk_create_tasks(self, mock_enqueue):
+        """Test bulk task creation inserts every task and dispatches once"""
+        url = reverse('core:task-bulk-create')
+        payload = [{"title": f"Bulk {i}", "description": "Bulk task"} for i in range(30)]
+        response = self.client.post(url, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 30)
+        self.assertEqual(Task.objects.count(), 30)
+        mock_enqueue.assert_called_once_with([item['id'] for item in response.data])
+
+    def test_bulk_create_rejects_invalid_items(self):
+        """Test one invalid item rejects the whole batch"""
+        url = reverse('core:task-bulk-create')
+        payload = [{"title": "Valid", "description": "ok"}, {"title": ""}]
+        response = self.client.post(url, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Task.objects.count(), 0)
+
     def test_task_detail(self):
         """Test retrieving single task"""
         task = Task.objects.create(**self.task_data)
@@ -64,6 +168,499 @@ class TaskAPITest(APITestCase):
         self.assertEqual(response.data['title'], task.title)
 
 
+class TaskEventStreamTest(TestCase):
+    """Test the Server-Sent Events stream of task status changes"""
+
+    async def test_stream_sends_snapshot_then_matching_transitions(self):
+        """Test a watched task's snapshot is followed by only its matching events"""
+        task = await Task.objects.acreate(title="Watched", description="Streamed")
+        response = await self.async_client.get(
+            reverse('core:async-task-events'),
+            {'task_id': task.id, 'status': 'processing,completed', 'timeout': 0.2}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+
+        self.assertEqual(await anext(stream), b'retry: 1000\n\n')
+        self.assertEqual(
+            await anext(stream),
+            f'event: snapshot\ndata: {{"task_id":{task.id},"status":"pending"}}\n\n'.encode()
+        )
+
+        bus = get_event_bus()
+        bus.publish({'task_id': task.id + 1, 'status': 'completed', 'previous_status': 'processing'})
+        bus.publish({'task_id': task.id, 'status': 'failed', 'previous_status': 'processing'})
+        bus.publish({'task_id': task.id, 'status': 'completed', 'previous_status': 'processing'})
+        event = await anext(stream)
+        # Idle until the deadline, then the stream ends
+        remainder = [chunk async for chunk in stream]
+
+        self.assertEqual(
+            event,
+            f'event: status\ndata: {{"task_id":{task.id},"status":"completed","previous_status":"processing"}}\n\n'
+            .encode()
+        )
+        self.assertEqual(remainder, [b': keepalive\n\n'])
+
+    def test_transition_publishes_after_commit(self):
+        """Test a status transition is published only once committed"""
+        task = Task.objects.create(title="Published", description="Event")
+
+        with patch('core.events.publish_task_event') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                Task.objects.transition(task.id, 'pending', 'processing')
+                publish.assert_not_called()
+
+        publish.assert_called_once_with(task.id, 'processing', 'pending')
+
+    def test_invalid_filters_rejected(self):
+        """Test bad task ids and statuses return 400 before streaming"""
+        url = reverse('core:async-task-events')
+
+        self.assertEqual(self.client.get(url, {'task_id': 'abc'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'status': 'unknown'}).status_code, status.HTTP_400_BAD_REQUEST)
+        for timeout in ('nan', 'inf', '-1'):
+            self.assertEqual(self.client.get(url, {'timeout': timeout}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(TASK_CACHE_TIMEOUT=300)
+class TaskCacheTest(APITestCase):
+    """Test the read-through cache behind the task detail endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        self.task = Task.objects.create(title="Cached Task", description="Polled task")
+        self.url = reverse('core:task-detail', kwargs={'pk': self.task.pk})
+
+    def test_repeated_reads_skip_database(self):
+        """Test a second read is served from cache"""
+        self.client.get(self.url)
+        before = task_cache_stats()
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.data['title'], "Cached Task")
+        self.assertEqual(task_cache_stats()['hits'], before['hits'] + 1)
+
+    def test_transition_invalidates_cache(self):
+        """Test status writes from process_task are visible once committed"""
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.transition(self.task.pk, 'pending', 'processing')
+            # Until COMMIT, readers keep seeing the cached row
+            self.assertEqual(self.client.get(self.url).data['status'], "pending")
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['status'], "processing")
+
+    def test_update_invalidates_cache(self):
+        """Test API updates are visible once committed"""
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.url, {"title": "Renamed"}, format='json')
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['title'], "Renamed")
+
+    @override_settings(TASK_CACHE_TIMEOUT=0)
+    def test_disabled_cache_reads_through(self):
+        """Test a zero timeout serves every read from the database"""
+        self.client.get(self.url)
+        Task.objects.filter(pk=self.task.pk).update(status='completed')
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['status'], "completed")
+
+
+class ListFilterTest(APITestCase):
+    """Test query parameter filtering on the list endpoints"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner")
+        self.pending = Task.objects.create(title="Pending", description="Waiting", created_by=self.owner)
+        self.failed = Task.objects.create(title="Failed", description="Broken", status="failed")
+        self.completed = Task.objects.create(title="Completed", description="Done", status="completed")
+        Task.objects.filter(pk=self.completed.pk).update(created_at=timezone.now() - timedelta(days=10))
+
+    def result_ids(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {item['id'] for item in response.data['results']}
+
+    def test_filter_tasks(self):
+        """Test status (single and list), owner and created_at range filters"""
+        url = reverse('core:task-list-create')
+        week_ago = (timezone.now() - timedelta(days=7)).date().isoformat()
+
+        self.assertEqual(self.result_ids(url, {'status': 'failed'}), {self.failed.id})
+        self.assertEqual(self.result_ids(url, {'status': 'failed,completed'}), {self.failed.id, self.completed.id})
+        self.assertEqual(self.result_ids(url, {'created_by': self.owner.id}), {self.pending.id})
+        self.assertEqual(self.result_ids(url, {'created_at_after': week_ago}), {self.pending.id, self.failed.id})
+        self.assertEqual(self.result_ids(url, {'created_at_before': week_ago}), {self.completed.id})
+        self.assertEqual(
+            self.result_ids(url, {'status': 'pending', 'pagination': 'cursor'}),
+            {self.pending.id}
+        )
+
+    def test_invalid_filters_rejected(self):
+        """Test bad filter values return 400 with per-parameter errors"""
+        response = self.client.get(reverse('core:task-list-create'), {
+            'status': 'archived', 'created_by': 'me', 'updated_at_after': 'yesterday'
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {'status', 'created_by', 'updated_at_after'})
+
+    def test_filter_email_logs(self):
+        """Test success and recipient filters on email logs, sync and async"""
+        failed = EmailLog.objects.create(recipient="a@example.com", subject="A", message="A", success=False)
+        EmailLog.objects.create(recipient="b@example.com", subject="B", message="B", success=True)
+
+        self.assertEqual(self.result_ids(reverse('core:email-log-list'), {'success': 'false'}), {failed.id})
+        self.assertEqual(
+            self.result_ids(reverse('core:email-log-list'), {'recipient': 'a@example.com'}),
+            {failed.id}
+        )
+        response = self.client.get(reverse('core:async-email-log-list'), {'success': 'false'})
+        self.assertEqual([item['id'] for item in response.json()['results']], [failed.id])
+
+    def test_status_filter_uses_index(self):
+        """Test a status-filtered page is served by the (status, -created_at, id) index"""
+        plan = Task.objects.filter(status='pending').order_by('-created_at', 'id')[:20].explain()
+        self.assertIn('core_task_status_created_idx', plan)
+
+
+class ScalableAdminTest(TestCase):
+    """Test the task admin changelist on large tables"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(username="admin", password="secret", email="a@example.com")
+        self.client.force_login(self.admin_user)
+        owners = [User.objects.create_user(username=f"owner{i}") for i in range(5)]
+        for i, owner in enumerate(owners):
+            Task.objects.create(title=f"Task {i}", description="Owned", created_by=owner)
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:core_task_changelist'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [query['sql'] for query in queries.captured_queries]
+
+    def test_changelist_joins_owner_and_counts_once(self):
+        """Test owners are joined and the count is cached between page loads"""
+        first = self.changelist_queries()
+        second = self.changelist_queries()
+
+        self.assertEqual(sum('COUNT(' in sql for sql in first), 1)
+        self.assertEqual(sum('COUNT(' in sql for sql in second), 0)
+        # Only the session's own user lookup; owners come from the join
+        self.assertEqual(sum('FROM "auth_user" WHERE "auth_user"."id" =' in sql for sql in second), 1)
+
+    def test_paginator_uses_planner_estimate_above_threshold(self):
+        """Test large results report the planner estimate instead of counting"""
+        with patch('core.pagination.planner_row_estimate', return_value=2_000_000):
+            paginator = EstimatedCountPaginator(Task.objects.all(), 100)
+            with self.assertNumQueries(0):
+                self.assertEqual(paginator.count, 2_000_000)
+
+        with patch('core.pagination.planner_row_estimate', return_value=3):
+            self.assertEqual(EstimatedCountPaginator(Task.objects.all(), 100).count, 5)
+
+
+class SearchTest(APITestCase):
+    """Test full-text search over tasks and email logs"""
+
+    def setUp(self):
+        self.invoice = Task.objects.create(title="Send invoices", description="Monthly billing run")
+        self.report = Task.objects.create(title="Quarterly report", description="Processing sales figures")
+
+    def search_ids(self, url, query):
+        response = self.client.get(url, {'q': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+
+    def test_search_tasks_with_stemming(self):
+        """Test ?q= matches stemmed words across title and description"""
+        url = reverse('core:task-list-create')
+        self.assertEqual(self.search_ids(url, 'invoice'), [self.invoice.id])
+        self.assertEqual(self.search_ids(url, 'processed figures'), [self.report.id])
+        self.assertEqual(self.search_ids(url, 'invoice figures'), [])
+
+    def test_search_index_follows_writes(self):
+        """Test the index tracks updates and deletes but not status transitions"""
+        url = reverse('core:task-list-create')
+        self.invoice.title = "Send receipts"
+        self.invoice.save()
+        Task.objects.transition(self.invoice.id, 'pending', 'processing')
+        self.report.delete()
+
+        self.assertEqual(self.search_ids(url, 'invoices'), [])
+        self.assertEqual(self.search_ids(url, 'receipts'), [self.invoice.id])
+        self.assertEqual(self.search_ids(url, 'report'), [])
+
+    def test_search_email_logs_and_operators_are_escaped(self):
+        """Test email log search by recipient and that FTS syntax in queries is inert"""
+        log = EmailLog.objects.create(recipient="alice@example.com", subject="Welcome aboard", message="Hi")
+        EmailLog.objects.create(recipient="bob@example.com", subject="Password reset", message="Hi")
+        url = reverse('core:email-log-list')
+
+        self.assertEqual(self.search_ids(url, 'alice@example.com'), [log.id])
+        self.assertEqual(self.search_ids(url, 'welcome'), [log.id])
+        self.assertEqual(self.search_ids(url, 'NEAR( OR "*'), [])
+
+    async def test_async_list_search(self):
+        """Test the async list endpoint accepts ?q="""
+        response = await self.async_client.get(reverse('core:async-task-list-create'), {'q': 'quarterly'})
+        self.assertEqual([item['id'] for item in response.json()['results']], [self.report.id])
+
+    def test_admin_search_uses_index(self):
+        """Test the admin changelist search goes through the full-text index"""
+        admin_user = User.objects.create_superuser(username="admin", password="secret", email="a@example.com")
+        self.client.force_login(admin_user)
+
+        response = self.client.get(reverse('admin:core_task_changelist'), {'q': 'billing'})
+
+        self.assertEqual(list(response.context['cl'].result_list), [self.invoice])
+
+
+class FastPathTest(APITestCase):
+    """Test the values() serialization fast path and the orjson renderer"""
+
+    def setUp(self):
+        user = User.objects.create_user(username="owner")
+        Task.objects.create(title="Owned \u2028 t\u00e2che", description="Line\nbreak", created_by=user)
+        Task.objects.create(title="Anonymous", description="No owner", status="failed")
+        EmailLog.objects.create(recipient="a@example.com", subject="Ok", message="Sent", success=True)
+        EmailLog.objects.create(recipient="b@example.com", subject="Bad", message="Failed", error_message="Refused")
+
+    def test_values_serializer_matches_model_serializer(self):
+        """Test the fast path renders byte-identical JSON to the ModelSerializers"""
+        renderer = JSONRenderer()
+        for serializer_class, queryset in ((TaskSerializer, Task.objects.all()),
+                                           (EmailLogSerializer, EmailLog.objects.all())):
+            fast = ValuesSerializer(serializer_class)
+            self.assertEqual(
+                renderer.render(fast.serialize(queryset.values(*fast.columns))),
+                renderer.render(serializer_class(queryset, many=True).data)
+            )
+
+    def test_list_endpoints_match_model_serializer(self):
+        """Test list responses are byte-identical to the ModelSerializer output"""
+        response = self.client.get(reverse('core:task-list-create'))
+        expected = JSONRenderer().render({
+            'count': 2,
+            'next': None,
+            'previous': None,
+            'results': TaskSerializer(Task.objects.all(), many=True).data,
+        })
+        self.assertEqual(response.content, expected)
+
+        response = self.client.get(reverse('core:email-log-list'), {'pagination': 'cursor'})
+        self.assertEqual(
+            json.loads(response.content)['results'],
+            json.loads(JSONRenderer().render(EmailLogSerializer(EmailLog.objects.all(), many=True).data))
+        )
+
+    def test_fast_renderer_matches_json_renderer(self):
+        """Test FastJSONRenderer produces the same bytes as JSONRenderer"""
+        data = {
+            'results': TaskSerializer(Task.objects.all(), many=True).data,
+            'when': timezone.now(),
+            'amount': Decimal('1.50'),
+            'ids': {1, 2},
+            'nested': {'none': None, 'flag': False, 'text': 'caf\u00e9 \u2029'},
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class ConditionalGetTest(APITestCase):
+    """Test ETag / Last-Modified handling on the core API"""
+
+    def setUp(self):
+        cache.clear()
+        self.task = Task.objects.create(title="Polled Task", description="Polled")
+
+    def test_detail_not_modified(self):
+        """Test a matching If-None-Match on a task returns 304"""
+        url = reverse('core:task-detail', kwargs={'pk': self.task.pk})
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_etag_changes_on_transition(self):
+        """Test a status change invalidates the task ETag"""
+        url = reverse('core:task-detail', kwargs={'pk': self.task.pk})
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.transition(self.task.pk, 'pending', 'processing')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], "processing")
+
+    def test_list_not_modified_until_new_row(self):
+        """Test list ETags track inserts"""
+        url = reverse('core:task-list-create')
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Task.objects.create(title="New Task", description="Changes the list")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_not_modified_skips_serialization(self):
+        """Test a list 304 runs one narrow page query and serializes nothing"""
+        url = reverse('core:task-list-create')
+        response = self.client.get(url, {'pagination': 'cursor'})
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as queries, \
+                patch.object(TaskListCreateView.values_serializer, 'serialize') as serialize:
+            response = self.client.get(url, {'pagination': 'cursor'}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        serialize.assert_not_called()
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT(', queries[0]['sql'].upper())
+        self.assertNotIn('"description"', queries[0]['sql'])
+
+        Task.objects.filter(pk=self.task.pk).delete()
+        response = self.client.get(url, {'pagination': 'cursor'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_email_log_list_not_modified(self):
+        """Test email log list answers If-None-Match"""
+        EmailLog.objects.create(recipient="test@example.com", subject="Hi", message="Hello")
+        url = reverse('core:email-log-list')
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_email_log_etag_tracks_outcome_updates(self):
+        """Test an outcome written in place changes the email log list ETag"""
+        email_log = EmailLog.objects.create(recipient="test@example.com", subject="Hi", message="Hello")
+        url = reverse('core:email-log-list')
+        etag = self.client.get(url)['ETag']
+
+        EmailLog.objects.bulk_update([EmailLog(pk=email_log.pk, success=True, error_message=None)],
+                                     ['success', 'error_message'])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['results'][0]['success'])
+
+
+class ExportTest(APITestCase):
+    """Test streaming export endpoints"""
+
+    def setUp(self):
+        self.old_task = Task.objects.create(title="Old", description="Before range")
+        Task.objects.filter(pk=self.old_task.pk).update(created_at=timezone.now() - timedelta(days=10))
+        self.new_task = Task.objects.create(title="New", description="In range")
+
+    def test_task_export_ndjson_with_date_range(self):
+        """Test NDJSON export honours the since filter"""
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        response = self.client.get(reverse('core:task-export'), {'since': since})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.new_task.id])
+
+    def test_email_log_export_csv(self):
+        """Test CSV export writes a header and one line per log"""
+        EmailLog.objects.create(recipient="test@example.com", subject="Hi, there", message="Hello")
+        response = self.client.get(reverse('core:email-log-export'), {'format': 'csv'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:3], ['id', 'recipient', 'subject'])
+        self.assertEqual(rows[1][2], "Hi, there")
+
+    def test_export_rejects_bad_date(self):
+        """Test invalid range parameters return 400"""
+        response = self.client.get(reverse('core:task-export'), {'until': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncExportTest(TestCase):
+    """Test streaming exports served over ASGI"""
+
+    async def test_export_streams_asynchronously(self):
+        """Test an ASGI export streams from an async iterator without buffering"""
+        await Task.objects.acreate(title="First", description="Exported")
+        await Task.objects.acreate(title="Second", description="Exported")
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            response = await self.async_client.get(reverse('core:task-export'), {'format': 'csv'})
+            body = b''.join([chunk async for chunk in response.streaming_content])
+
+        self.assertTrue(response.is_async)
+        self.assertFalse([w for w in caught if 'synchronous iterators' in str(w.message)])
+
+        rows = list(csv.reader(body.decode().splitlines()))
+        self.assertEqual([row[1] for row in rows], ['title', 'First', 'Second'])
+
+
+class AsyncAPITest(TestCase):
+    """Test the async (ASGI) endpoints"""
+
+    async def test_async_list_matches_sync_serialization(self):
+        """Test async list pages through tasks with DRF-identical items"""
+        for i in range(3):
+            await Task.objects.acreate(title=f"Async {i}", description="Listed")
+        url = reverse('core:async-task-list-create')
+
+        response = await self.async_client.get(url, {'limit': 2})
+        first = response.json()
+        response = await self.async_client.get(first['next'])
+        second = response.json()
+
+        expected = TaskSerializer(
+            [task async for task in Task.objects.order_by('-created_at', 'id')], many=True
+        ).data
+        self.assertEqual(first['results'] + second['results'], json.loads(json.dumps(expected)))
+        self.assertIsNone(second['next'])
+
+    async def test_async_list_limit_is_clamped(self):
+        """Test out-of-range limits are clamped instead of failing"""
+        for i in range(2):
+            await Task.objects.acreate(title=f"Clamped {i}", description="Listed")
+        url = reverse('core:async-task-list-create')
+
+        for limit, expected in ((0, 1), (-3, 1), (1000, 2)):
+            response = await self.async_client.get(url, {'limit': limit})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.json()['results']), expected)
+
+    async def test_async_create_task(self):
+        """Test async creation inserts the task and its outbox message"""
+        url = reverse('core:async-task-list-create')
+        response = await self.async_client.post(
+            url, {"title": "Async Task", "description": "Created"}, content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        task = await Task.objects.aget()
+        message = await OutboxMessage.objects.aget()
+        self.assertEqual(message.args, [task.id])
+
+    async def test_async_detail_not_found(self):
+        """Test missing tasks return a JSON 404"""
+        cache.clear()
+        response = await self.async_client.get(reverse('core:async-task-detail', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
 class EmailAPITest(APITestCase):
     """Test email notification API"""
 
@@ -74,17 +671,128 @@ class EmailAPITest(APITestCase):
             "message": "This is a test message"
         }
 
-    @patch('core.tasks.send_email_notification.delay')
-    def test_send_email_api(self, mock_delay):
+    def test_send_email_api(self):
         """Test email sending API endpoint"""
-        mock_delay.return_value.id = "test-task-id"
-
         url = reverse('core:send-email')
         response = self.client.post(url, self.email_data, format='json')
 
         self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
         self.assertIn('task_id', response.data)
-        mock_delay.assert_called_once()
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.task_id, response.data['task_id'])
+        self.assertEqual(message.args, ["test@example.com", "Test Email", "This is a test message"])
+
+
+class IdempotencyTest(APITestCase):
+    """Test Idempotency-Key handling on task creation and email sending"""
+
+    def setUp(self):
+        cache.clear()
+        self.email_data = {"recipient": "retry@example.com", "subject": "Retry", "message": "Sent once"}
+
+    def test_retried_task_create_replays_response(self):
+        """Test a retry with the same key creates nothing and replays the response"""
+        url = reverse('core:task-list-create')
+        data = {"title": "Once", "description": "Created once"}
+
+        first = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='create-1')
+        retry = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='create-1')
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    def test_key_reused_with_different_body_rejected(self):
+        """Test a key cannot be replayed for a different request"""
+        url = reverse('core:send-email')
+        self.client.post(url, self.email_data, format='json', HTTP_IDEMPOTENCY_KEY='email-1')
+
+        response = self.client.post(
+            url, dict(self.email_data, recipient="other@example.com"), format='json', HTTP_IDEMPOTENCY_KEY='email-1'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    def test_retry_during_original_request_conflicts(self):
+        """Test a retry arriving while the original runs gets 409"""
+        url = reverse('core:send-email')
+        retries = []
+
+        def retry_while_running(*args):
+            retries.append(self.client.post(url, self.email_data, format='json', HTTP_IDEMPOTENCY_KEY='email-2'))
+            return 'task-id'
+
+        with patch('core.views.enqueue', side_effect=retry_while_running):
+            response = self.client.post(url, self.email_data, format='json', HTTP_IDEMPOTENCY_KEY='email-2')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(retries[0].status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(retries[0]['Retry-After'], '1')
+
+    def test_error_response_releases_key(self):
+        """Test a rejected request does not hold its key"""
+        url = reverse('core:send-email')
+        invalid = self.client.post(url, {"recipient": "bad"}, format='json', HTTP_IDEMPOTENCY_KEY='email-3')
+        valid = self.client.post(url, self.email_data, format='json', HTTP_IDEMPOTENCY_KEY='email-3')
+
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(valid.status_code, status.HTTP_202_ACCEPTED)
+
+    async def test_async_retry_replays_response(self):
+        """Test the async create endpoint honours the same keys"""
+        url = reverse('core:async-task-list-create')
+        data = {"title": "Async once", "description": "Created once"}
+
+        first = await self.async_client.post(
+            url, data, content_type='application/json', headers={'Idempotency-Key': 'async-1'}
+        )
+        retry = await self.async_client.post(
+            url, data, content_type='application/json', headers={'Idempotency-Key': 'async-1'}
+        )
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(await Task.objects.acount(), 1)
+
+
+class TaskResultLookupTest(APITestCase):
+    """Test the batched Celery result lookup"""
+
+    def setUp(self):
+        self.backend = CacheBackend(app=current_app, backend='memory')
+        patcher = patch.object(Celery, 'backend', new_callable=PropertyMock, return_value=self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lookup_reads_all_results_in_one_multi_get(self):
+        """Test states and results come back in request order from one mget"""
+        self.backend.store_result('sent', 'Email sent to a@example.com', states.SUCCESS)
+        self.backend.store_result('failed', smtplib.SMTPException('mailbox full'), states.FAILURE)
+
+        with patch.object(self.backend, 'mget', wraps=self.backend.mget) as mget:
+            response = self.client.post(
+                reverse('core:task-results'), {'task_ids': ['failed', 'unknown', 'sent', 'failed']}, format='json'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mget.assert_called_once()
+        results = response.data['results']
+        self.assertEqual([(r['task_id'], r['state']) for r in results],
+                         [('failed', 'FAILURE'), ('unknown', 'PENDING'), ('sent', 'SUCCESS')])
+        self.assertEqual(results[0]['result']['exc_message'], ['mailbox full'])
+        self.assertIsNone(results[1]['date_done'])
+        self.assertEqual(results[2]['result'], 'Email sent to a@example.com')
+
+    @override_settings(TASK_RESULT_LOOKUP_MAX_IDS=2)
+    def test_lookup_size_is_limited(self):
+        """Test requests over the id limit are rejected"""
+        response = self.client.post(reverse('core:task-results'), {'task_ids': ['a', 'b', 'c']}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('task_ids', response.data)
 
 
 class CeleryTaskTest(TestCase):
@@ -107,25 +815,564 @@ class CeleryTaskTest(TestCase):
         self.assertEqual(self.task.status, "completed")
         self.assertIn("completed successfully", result)
 
-    @patch('django.core.mail.send_mail')
-    def test_send_email_notification(self, mock_send_mail):
-        """Test email notification task"""
-        mock_send_mail.return_value = True
+    @patch('time.sleep')
+    def test_process_task_skips_duplicate_delivery(self, mock_sleep):
+        """Test a second delivery of a claimed task does not run it again"""
+        process_task(self.task.id)
+        result = process_task(self.task.id)
+
+        self.assertIn("already claimed", result)
+        self.assertEqual(mock_sleep.call_count, 1)
+
+    @patch('time.sleep')
+    def test_redelivered_task_reclaims_processing(self, mock_sleep):
+        """Test a broker redelivery after a worker death finishes the task"""
+        Task.objects.transition(self.task.id, 'pending', 'processing')
+        self.assertIn("already claimed", process_task(self.task.id))
+
+        process_task.push_request(delivery_info={'redelivered': True}, retries=0)
+        try:
+            result = process_task.run(self.task.id)
+        finally:
+            process_task.pop_request()
+
+        self.assertIn("completed successfully", result)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "completed")
+
+    @patch('time.sleep')
+    def test_redelivered_batch_releases_claimed_tasks(self, mock_sleep):
+        """Test a redelivered batch reruns tasks its dead predecessor claimed"""
+        Task.objects.transition(self.task.id, 'pending', 'processing')
+
+        process_task_batch.push_request(delivery_info={'redelivered': True})
+        try:
+            process_task_batch.run([self.task.id])
+        finally:
+            process_task_batch.pop_request()
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "completed")
+
+    @patch('time.sleep')
+    def test_process_task_batch(self, mock_sleep):
+        """Test a batch processes every task in the chunk"""
+        other = Task.objects.create(title="Second", description="Batch member")
+
+        result = process_task_batch([self.task.id, other.id])
+
+        self.assertIn("batch of 2 tasks", result)
+        self.assertEqual(
+            set(Task.objects.values_list('status', flat=True)),
+            {"completed"}
+        )
 
+    def test_enqueue_process_tasks_chunks(self):
+        """Test bulk dispatch queues one outbox message per chunk"""
+        with self.settings(TASK_BULK_DISPATCH_CHUNK_SIZE=2):
+            task_ids = enqueue_process_tasks([1, 2, 3, 4, 5])
+
+        messages = list(OutboxMessage.objects.all())
+        self.assertEqual([message.task_id for message in messages], task_ids)
+        self.assertEqual({message.task_name for message in messages}, {'core.tasks.process_task_batch'})
+        self.assertEqual([message.args for message in messages], [[[1, 2]], [[3, 4]], [[5]]])
+
+    def test_send_email_notification(self):
+        """Test email notification task"""
         result = send_email_notification(
             "test@example.com",
             "Test Subject",
             "Test message"
         )
+        email_log_writer.flush()
 
         # Check email log was created
         email_log = EmailLog.objects.get()
         self.assertEqual(email_log.recipient, "test@example.com")
         self.assertEqual(email_log.success, True)
 
-        mock_send_mail.assert_called_once()
+        self.assertEqual(len(mail.outbox), 1)
         self.assertIn("sent successfully", result)
 
+    def test_send_email_notifications_batch(self):
+        """Test batched notifications share one connection and log each message"""
+        notifications = [
+            {"recipient": f"user{i}@example.com", "subject": "Batch", "message": "Hello"}
+            for i in range(3)
+        ]
+
+        with patch('core.mail.get_connection', wraps=get_connection) as mock_get_connection:
+            result = send_email_notifications_batch(notifications)
+        email_log_writer.flush()
+
+        self.assertIn("Sent 3 of 3", result)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(EmailLog.objects.filter(success=True).count(), 3)
+        self.assertLessEqual(mock_get_connection.call_count, 1)
+
+    def test_batch_reconnects_and_logs_failures(self):
+        """Test a dropped connection is reopened and a failing message only fails its own log"""
+        notifications = [
+            {"recipient": f"user{i}@example.com", "subject": "Batch", "message": "Hello"}
+            for i in range(3)
+        ]
+        outcomes = iter([smtplib.SMTPServerDisconnected(), 1, smtplib.SMTPRecipientsRefused({}), 1])
+
+        def send_messages(messages):
+            outcome = next(outcomes)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        with patch('core.mail.get_connection') as mock_get_connection:
+            mock_get_connection.return_value.send_messages.side_effect = send_messages
+            result = send_email_notifications_batch(notifications)
+        email_log_writer.flush()
+
+        self.assertIn("Sent 2 of 3", result)
+        failed = EmailLog.objects.get(success=False)
+        self.assertEqual(failed.recipient, "user1@example.com")
+
+    @override_settings(EMAIL_BATCH_SIZE=2)
+    def test_enqueue_email_notifications_batches(self):
+        """Test queued notifications are split into EMAIL_BATCH_SIZE batches"""
+        notifications = [
+            {"recipient": f"user{i}@example.com", "subject": "Batch", "message": "Hello"}
+            for i in range(3)
+        ]
+
+        task_ids = enqueue_email_notifications(notifications)
+
+        self.assertEqual(len(task_ids), 2)
+        self.assertEqual(
+            [len(message.args[0]) for message in OutboxMessage.objects.order_by('id')],
+            [2, 1]
+        )
+
+
+class CeleryRoutingTest(TestCase):
+    """Test Celery queue routing"""
+
+    def test_tasks_route_to_dedicated_queues(self):
+        """Test each task is published to its own queue with a matching binding"""
+        router = current_app.amqp.router
+        expected = {
+            process_task.name: 'processing',
+            process_task_batch.name: 'processing',
+            send_email_notification.name: 'email',
+            send_email_notifications_batch.name: 'email',
+            cleanup_old_tasks.name: 'maintenance',
+        }
+        for name, queue in expected.items():
+            route = router.route({}, name)
+            self.assertEqual(route['queue'].name, queue)
+            self.assertEqual(route['queue'].routing_key, queue)
+
+    def test_single_tasks_outrank_bulk_chunks(self):
+        """Test single task processing is published at a higher priority than batches"""
+        router = current_app.amqp.router
+        self.assertLess(
+            router.route({}, process_task.name)['priority'],
+            router.route({}, process_task_batch.name)['priority']
+        )
+
+    def test_email_task_rate_limited(self):
+        """Test the email task carries the configured rate limit"""
+        self.assertEqual(send_email_notification.rate_limit, '120/m')
+
+    def test_email_batch_rate_limit_keeps_the_email_rate(self):
+        """Test the batch task's rate limit is the email rate divided by the batch size"""
+        self.assertEqual(send_email_notifications_batch.rate_limit, '12/m')
+
+
+class EmailLogWriterTest(TestCase):
+    """Test buffered email log persistence"""
+
+    def setUp(self):
+        self.writer = EmailLogWriter()
+        self.addCleanup(self.writer.flush)
+
+    def make_log(self, **kwargs):
+        return EmailLog(recipient="test@example.com", subject="Subject", message="Body", **kwargs)
+
+    @override_settings(EMAIL_LOG_BUFFER_SIZE=3)
+    def test_logs_are_written_in_bulk_at_threshold(self):
+        """Test logs stay buffered until the size threshold is reached"""
+        self.writer.add(self.make_log(success=True), self.make_log(success=True))
+        self.assertEqual(EmailLog.objects.count(), 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.writer.add(self.make_log(error_message="boom"))
+
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(EmailLog.objects.count(), 3)
+        self.assertEqual(EmailLog.objects.filter(success=True).count(), 2)
+
+    def test_pre_inserted_logs_only_update_outcome(self):
+        """Test flushing a pre-inserted log writes its outcome fields"""
+        email_log = EmailLog.objects.create(recipient="test@example.com", subject="Subject", message="Body")
+        email_log.success = True
+        self.writer.add(email_log)
+
+        self.assertEqual(self.writer.flush(), 1)
+        email_log.refresh_from_db()
+        self.assertTrue(email_log.success)
+        self.assertEqual(EmailLog.objects.count(), 1)
+
+    @override_settings(EMAIL_LOG_MAX_BUFFER=2)
+    def test_failed_flush_rearms_timer_and_caps_buffer(self):
+        """Test a failed flush schedules a retry and keeps only the newest logs"""
+        logs = [self.make_log(error_message=f"error {i}") for i in range(3)]
+        self.writer.add(*logs)
+
+        with patch('core.mail.EmailLog.objects.bulk_create', side_effect=DatabaseError("down")):
+            self.assertEqual(self.writer.flush(), 0)
+
+        self.assertIsNotNone(self.writer._timer)
+        self.assertEqual(self.writer.flush(), 2)
+        self.assertEqual(
+            sorted(EmailLog.objects.values_list('error_message', flat=True)),
+            ["error 1", "error 2"]
+        )
+
+
+class EmailConnectionPoolTest(TestCase):
+    """Test pooled email connections"""
+
+    def setUp(self):
+        self.pool = EmailConnectionPool()
+
+    def test_connection_is_reused(self):
+        """Test a returned connection is handed out again"""
+        with self.pool.connection() as first:
+            pass
+        with self.pool.connection() as second:
+            pass
+
+        self.assertIs(first, second)
+
+    @patch('core.mail.get_connection')
+    def test_dead_smtp_connection_is_replaced(self, mock_get_connection):
+        """Test a connection failing its NOOP health check is reopened"""
+        mock_get_connection.side_effect = lambda **kwargs: MagicMock()
+        with self.pool.connection() as first:
+            first.connection.noop.side_effect = smtplib.SMTPServerDisconnected()
+        with self.pool.connection() as second:
+            pass
+
+        self.assertIsNot(first, second)
+        first.close.assert_called_once()
+        self.assertEqual(mock_get_connection.call_count, 2)
+
+
+class OutboxRelayTest(TestCase):
+    """Test the outbox relay"""
+
+    def setUp(self):
+        self.first = enqueue(process_task, 1)
+        self.second = enqueue(process_task, 2)
+
+    @patch('core.outbox.current_app.producer_or_acquire')
+    @patch('core.outbox.current_app.send_task')
+    def test_relay_publishes_pending_messages(self, mock_send_task, mock_producer):
+        """Test the relay publishes every pending message under its task id"""
+        self.assertEqual(relay_batch(), 2)
+        self.assertEqual(relay_batch(), 0)
+
+        self.assertEqual(
+            [c.kwargs['task_id'] for c in mock_send_task.call_args_list],
+            [self.first, self.second]
+        )
+        mock_send_task.assert_any_call(
+            'core.tasks.process_task', args=[1], kwargs={}, task_id=self.first,
+            producer=mock_producer.return_value.__enter__.return_value, retry=False
+        )
+        self.assertFalse(OutboxMessage.objects.filter(published_at__isnull=True).exists())
+
+    @patch('core.outbox.current_app.producer_or_acquire')
+    @patch('core.outbox.current_app.send_task')
+    def test_relay_keeps_messages_after_publish_failure(self, mock_send_task, mock_producer):
+        """Test a broker error leaves the failed and later messages pending"""
+        mock_send_task.side_effect = [None, ConnectionError("broker down")]
+
+        self.assertEqual(relay_batch(), 1)
+
+        failed = OutboxMessage.objects.get(task_id=self.second)
+        self.assertIsNone(failed.published_at)
+        self.assertEqual(failed.attempts, 0)
+        self.assertEqual(failed.last_error, "broker down")
+        self.assertIsNotNone(OutboxMessage.objects.get(task_id=self.first).published_at)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    @patch('core.outbox.current_app.producer_or_acquire')
+    @patch('core.outbox.current_app.send_task')
+    def test_relay_parks_a_message_that_keeps_failing(self, mock_send_task, mock_producer):
+        """Test a failing message is skipped, then parked after OUTBOX_MAX_ATTEMPTS"""
+        def send_task(*args, **kwargs):
+            if kwargs['task_id'] == self.first:
+                raise TypeError("unserializable")
+        mock_send_task.side_effect = send_task
+
+        self.assertEqual(relay_batch(), 1)
+        self.assertIsNotNone(OutboxMessage.objects.get(task_id=self.second).published_at)
+
+        enqueue(process_task, 3)
+        self.assertEqual(relay_batch(), 1)
+        self.assertEqual(relay_batch(), 0)
+
+        poison = OutboxMessage.objects.get(task_id=self.first)
+        self.assertIsNone(poison.published_at)
+        self.assertEqual(poison.attempts, 2)
+        self.assertEqual(poison.last_error, "unserializable")
+        self.assertEqual(mock_send_task.call_count, 4)
+
+
+class BenchmarkTest(TestCase):
+    """Test the benchmark suite"""
+
+    def test_scenarios_cover_every_route(self):
+        """Test every core route has at least one benchmark scenario"""
+        routes = {pattern.name for pattern in core_urls.urlpatterns}
+        self.assertEqual(routes - {scenario.route for scenario in SCENARIOS}, set())
+
+    def test_run_benchmarks_reports_percentiles(self):
+        """Test a short run produces a summary for each scenario"""
+        dataset = seed(tasks=5, email_logs=5)
+        result_backend = CacheBackend(app=current_app, backend='memory')
+        with patch('core.views.get_health', return_value={'status': 'healthy'}), \
+                patch.object(Celery, 'backend', new_callable=PropertyMock, return_value=result_backend):
+            results = run_benchmarks(self.client, dataset, requests=3, warmup=1)
+
+        self.assertEqual(set(results), {scenario.name for scenario in SCENARIOS})
+        for result in results.values():
+            self.assertEqual(result['requests'], 3)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertLessEqual(result['p95_ms'], result['p99_ms'])
+
+    def test_compare_flags_regressions(self):
+        """Test p95 and throughput regressions beyond the threshold are reported"""
+        baseline = {'task-list': {'rps': 100.0, 'p95_ms': 10.0}}
+
+        self.assertEqual(compare({'task-list': {'rps': 90.0, 'p95_ms': 11.0}}, baseline, 0.2), [])
+        self.assertEqual(len(compare({'task-list': {'rps': 70.0, 'p95_ms': 13.0}}, baseline, 0.2)), 2)
+
+
+class TaskStatusCountTest(APITestCase):
+    """Test the incrementally maintained task status counters"""
+
+    def counts(self):
+        return {row.status: row.count for row in TaskStatusCount.objects.all() if row.count}
+
+    def test_counts_follow_every_write_path(self):
+        """Test create, save, transition, bulk create and delete keep counts exact"""
+        task = Task.objects.create(title="Counted", description="One")
+        Task.objects.bulk_create([Task(title=f"Bulk {i}", description="Many") for i in range(3)])
+        self.assertEqual(self.counts(), {'pending': 4})
+
+        Task.objects.transition(task.id, 'pending', 'processing')
+        loaded = Task.objects.exclude(pk=task.pk).first()
+        loaded.status = 'failed'
+        loaded.save()
+        loaded.save()
+        self.assertEqual(self.counts(), {'pending': 2, 'processing': 1, 'failed': 1})
+
+        loaded.delete()
+        Task.objects.get(pk=task.pk).delete()
+        self.assertEqual(self.counts(), {'pending': 2})
+        self.assertEqual(self.counts(), dict(Task.objects.order_by().values_list('status').annotate(n=Count('pk'))))
+
+    @override_settings(RETENTION_BATCH_PAUSE=0)
+    def test_retention_prune_decrements_counts(self):
+        """Test rows deleted by the retention engine leave the counters"""
+        for i in range(3):
+            Task.objects.create(title=f"Done {i}", description="Expired", status="completed")
+        Task.objects.create(title="Pending", description="Kept")
+        Task.objects.update(updated_at=timezone.now() - timedelta(days=60))
+
+        cleanup_old_tasks()
+
+        self.assertEqual(self.counts(), {'pending': 1})
+
+    def test_reconcile_corrects_drift(self):
+        """Test reconciliation resets counters to the real counts"""
+        Task.objects.create(title="Real", description="Counted")
+        TaskStatusCount.objects.filter(status='pending').update(count=10)
+        TaskStatusCount.objects.create(status='failed', count=2)
+
+        result = reconcile_task_status_counts()
+
+        self.assertEqual(result, "Reconciled 2 task status counters")
+        self.assertEqual(self.counts(), {'pending': 1})
+
+    def test_stats_endpoint(self):
+        """Test the stats endpoint reports every status and the total"""
+        Task.objects.create(title="A", description="Counted")
+        Task.objects.create(title="B", description="Counted", status="completed")
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('core:task-stats'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'total': 2,
+            'by_status': {'pending': 1, 'processing': 0, 'completed': 1, 'failed': 0},
+        })
+
+
+class RetentionTest(TestCase):
+    """Test the batched retention engine"""
+
+    def setUp(self):
+        old = timezone.now() - timedelta(days=60)
+        for i in range(5):
+            Task.objects.create(title=f"Done {i}", description="Expired", status="completed")
+        Task.objects.create(title="Still pending", description="Kept", status="pending")
+        Task.objects.create(title="Recent", description="Kept", status="completed")
+        Task.objects.exclude(title="Recent").update(updated_at=old)
+        EmailLog.objects.create(recipient="old@example.com", subject="Old", message="Old", sent_at=old - timedelta(days=60))
+        EmailLog.objects.create(recipient="new@example.com", subject="New", message="New")
+
+    @override_settings(RETENTION_BATCH_SIZE=2, RETENTION_BATCH_PAUSE=0)
+    def test_cleanup_prunes_expired_rows_in_batches(self):
+        """Test only expired rows are removed, batch by batch"""
+        result = cleanup_old_tasks()
+
+        self.assertIn("Cleaned up 6 old rows", result)
+        self.assertEqual(
+            sorted(Task.objects.values_list('title', flat=True)),
+            ["Recent", "Still pending"]
+        )
+        self.assertEqual(list(EmailLog.objects.values_list('recipient', flat=True)), ["new@example.com"])
+
+    def test_time_budget_stops_run(self):
+        """Test an exhausted time budget leaves rows for the next run"""
+        results = run_retention(time_budget=0)
+
+        self.assertTrue(all(not result.complete for result in results))
+        self.assertEqual(Task.objects.count(), 7)
+
+
+class MetricsTest(APITestCase):
+    """Test the in-process Prometheus metrics"""
+
+    def test_requests_are_recorded_per_route(self):
+        """Test /metrics exposes latency, status and query counts by URL name"""
+        Task.objects.create(title="Metric Task", description="Counted")
+        self.client.get(reverse('core:task-list-create'))
+
+        response = self.client.get('/metrics')
+        body = response.content.decode()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        pid = f'pid="{os.getpid()}"'
+        self.assertIn(
+            f'http_request_duration_seconds_bucket{{{pid},route="core:task-list-create",method="GET",le="+Inf"}}', body
+        )
+        self.assertIn(f'http_requests_total{{{pid},route="core:task-list-create",method="GET",status="200"}}', body)
+        self.assertIn(f'http_request_db_queries_total{{{pid},route="core:task-list-create"}}', body)
+
+    def test_web_exporter_serves_this_worker(self):
+        """Test each web worker can serve its own labelled scrape target"""
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+
+        with override_settings(WEB_METRICS_PORT=port, WEB_METRICS_MAX_WORKERS=1), \
+                patch('core.metrics._web_exporter_port', None):
+            self.assertEqual(start_web_exporter(), port)
+            self.assertEqual(start_web_exporter(), port)
+
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/') as response:
+                body = response.read().decode()
+        self.assertIn(f'pid="{os.getpid()}"', body)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram samples follow the Prometheus bucket layout"""
+        registry = Registry()
+        histogram = registry.register(Histogram('job_seconds', 'Job time.', ('task',), buckets=(1, 5)))
+        histogram.observe(0.5, task='a')
+        histogram.observe(3, task='a')
+
+        body = registry.render()
+        self.assertIn('job_seconds_bucket{task="a",le="1"} 1', body)
+        self.assertIn('job_seconds_bucket{task="a",le="5"} 2', body)
+        self.assertIn('job_seconds_bucket{task="a",le="+Inf"} 2', body)
+        self.assertIn('job_seconds_count{task="a"} 2', body)
+
+    def test_database_connections_and_pool_stats_exported(self):
+        """Test new connections are counted and pool statistics are exposed"""
+        connection_created.send(sender=type(connection), connection=connection)
+        pool = MagicMock()
+        pool.get_stats.return_value = {'requests_num': 7, 'requests_wait_ms': 12}
+
+        with patch('core.metrics.connection_pool', return_value=pool):
+            body = registry.render()
+
+        self.assertIn('db_connections_opened_total{alias="default",vendor="sqlite"}', body)
+        self.assertIn('db_pool{alias="default",stat="requests_wait_ms"} 12', body)
+
+    def test_celery_hooks_record_runtime_and_queue_wait(self):
+        """Test Celery signal hooks export runtime and queue wait per task"""
+        process_task.push_request(published_at=time.time() - 2, eta=None)
+        try:
+            task_prerun.send(sender=process_task, task_id='metric-task', task=process_task)
+            task_postrun.send(sender=process_task, task_id='metric-task', task=process_task, state='SUCCESS')
+        finally:
+            process_task.pop_request()
+
+        body = registry.render()
+        self.assertIn('celery_task_queue_wait_seconds_count{task="core.tasks.process_task"}', body)
+        self.assertIn('celery_task_runtime_seconds_count{task="core.tasks.process_task",state="SUCCESS"}', body)
+
+
+@override_settings(QUERY_PROFILING_ENABLED=True, QUERY_PROFILING_REPEAT_THRESHOLD=2)
+class QueryProfilingTest(APITestCase):
+    """Test the opt-in query profiling middleware"""
+
+    def test_server_timing_header(self):
+        """Test profiled responses carry db, serialize, render and total timings"""
+        response = self.client.get(reverse('core:task-list-create'))
+
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('render;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_serialize_timing_covers_serializer_work(self):
+        """Test time spent in serializers inside the view is reported as serialize"""
+        task = Task.objects.create(title="Timed", description="Serialized")
+        to_representation = ModelSerializer.to_representation
+
+        def slow_to_representation(serializer, instance):
+            time.sleep(0.05)
+            return to_representation(serializer, instance)
+
+        with patch.object(ModelSerializer, 'to_representation', slow_to_representation):
+            response = self.client.get(reverse('core:task-detail', kwargs={'pk': task.pk}))
+
+        timings = dict(re.findall(r'(\w+);dur=([\d.]+)', response['Server-Timing']))
+        self.assertGreaterEqual(float(timings['serialize']), 50)
+
+    def test_repeated_query_shapes_are_reported(self):
+        """Test the same SQL shape run repeatedly is flagged as N+1"""
+        recorder = ProfilingQueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for title in ("a", "b", "c"):
+                Task.objects.filter(title=title).exists()
+
+        repeated = recorder.repeated(2)
+        self.assertEqual(len(repeated), 1)
+        self.assertEqual(repeated[0][1], 3)
+
+    def test_fingerprint_collapses_literals_and_in_lists(self):
+        """Test fingerprints ignore literal values and IN list length"""
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x'"),
+            fingerprint("SELECT *  FROM t WHERE id IN (%s) AND name = 'yy'")
+        )
+
 
 class HealthCheckTest(APITestCase):
     """Test health check endpoint"""
@@ -138,4 +1385,24 @@ class HealthCheckTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('status', response.data)
         self.assertIn('database', response.data)
-        self.assertIn('celery', response.data)
\ No newline at end of file
+        self.assertIn('celery', response.data)
+
+    @patch('core.health.check_redis')
+    @patch('core.health.current_app')
+    def test_health_check_reports_dependencies_and_caches(self, mock_app, mock_check_redis):
+        """Test each dependency is reported and probes reuse the result"""
+        mock_app.control.ping.return_value = [{'worker@host': {'ok': 'pong'}}]
+        url = reverse('core:health-check')
+
+        with self.settings(HEALTH_CHECK_CACHE_SECONDS=60):
+            with patch.dict('core.health._cached', {'result': None, 'expires': 0.0}):
+                first = self.client.get(url)
+                second = self.client.get(url)
+
+        self.assertEqual(first.data['status'], 'healthy')
+        self.assertEqual(first.data['database'], 'healthy')
+        self.assertEqual(first.data['redis'], 'healthy')
+        self.assertIn('database', first.data['latency_ms'])
+        self.assertFalse(first.data['cached'])
+        self.assertTrue(second.data['cached'])
+        mock_check_redis.assert_called_once()
@@ -1,12 +1,25 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'core'
 
 urlpatterns = [
     path('tasks/', views.TaskListCreateView.as_view(), name='task-list-create'),
+    path('tasks/bulk/', views.TaskBulkCreateView.as_view(), name='task-bulk-create'),
+    path('tasks/export/', views.task_export_view, name='task-export'),
+    path('tasks/stats/', views.task_stats_view, name='task-stats'),
     path('tasks/<int:pk>/', views.TaskDetailView.as_view(), name='task-detail'),
     path('email-logs/', views.EmailLogListView.as_view(), name='email-log-list'),
+    path('email-logs/export/', views.email_log_export_view, name='email-log-export'),
     path('send-email/', views.send_email_view, name='send-email'),
+    path('results/', views.task_results_view, name='task-results'),
     path('health/', views.health_check_view, name='health-check'),
+
+    # Async (ASGI) variants of the read and enqueue endpoints, and the task
+    # status event stream
+    path('async/tasks/', async_views.task_list_create_view, name='async-task-list-create'),
+    path('async/tasks/events/', async_views.task_events_view, name='async-task-events'),
+    path('async/tasks/<int:pk>/', async_views.task_detail_view, name='async-task-detail'),
+    path('async/email-logs/', async_views.email_log_list_view, name='async-email-log-list'),
+    path('async/send-email/', async_views.send_email_view, name='async-send-email'),
 ]
\ No newline at end of file
@@ -3,23 +3,59 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import require_GET
 
-from .models import Task, EmailLog
+from .cache import get_task_representation
+from .health import get_health
+from .idempotency import IDEMPOTENCY_HEADER, idempotent
+from .metrics import process_labels, registry
+from .exports import streaming_export, TASK_EXPORT_FIELDS, EMAIL_LOG_EXPORT_FIELDS
+from .conditional import ConditionalListMixin, conditional_response, task_etag
+from .fastpath import ValuesListMixin, ValuesSerializer
+from .models import Task, TaskStatusCount, EmailLog
+from .outbox import enqueue
+from .results import get_task_results
+from .filters import FieldFilter
+from .search import FullTextSearchFilter
 from .serializers import (
     TaskSerializer,
     TaskCreateSerializer,
     EmailNotificationSerializer,
-    EmailLogSerializer
+    EmailLogSerializer,
+    TaskResultLookupSerializer
+)
+from .tasks import process_task, send_email_notification, enqueue_process_tasks
+from .pagination import (
+    OptionalCursorPaginationMixin,
+    TaskCursorPagination,
+    EmailLogCursorPagination
+)
+
+IDEMPOTENCY_KEY_PARAMETER = openapi.Parameter(
+    IDEMPOTENCY_HEADER,
+    openapi.IN_HEADER,
+    description="Client-chosen unique key; a retry with the same key replays the original response",
+    type=openapi.TYPE_STRING,
+    required=False
 )
-from .tasks import process_task, send_email_notification
 
 
-class TaskListCreateView(generics.ListCreateAPIView):
+class TaskListCreateView(ConditionalListMixin, ValuesListMixin, OptionalCursorPaginationMixin,
+                         generics.ListCreateAPIView):
     """
     API endpoint for listing and creating tasks
     """
     queryset = Task.objects.all()
+    cursor_pagination_class = TaskCursorPagination
+    values_serializer = ValuesSerializer(TaskSerializer)
+    filter_backends = [FieldFilter, FullTextSearchFilter]
+    filter_fields = ['status', 'created_by']
+    filter_range_fields = ['created_at', 'updated_at']
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -29,19 +65,21 @@ class TaskListCreateView(generics.ListCreateAPIView):
     @swagger_auto_schema(
         operation_description="Create a new task and start background processing",
         request_body=TaskCreateSerializer,
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
         responses={
             201: TaskSerializer,
             400: 'Bad Request'
         }
     )
+    @method_decorator(idempotent('task-create'))
     def post(self, request, *args, **kwargs):
         serializer = TaskCreateSerializer(data=request.data)
         if serializer.is_valid():
-            # Create task
-            task = serializer.save(created_by=request.user if request.user.is_authenticated else None)
-
-            # Start background processing
-            process_task.delay(task.id)
+            # Create the task and queue its processing in one transaction;
+            # the outbox relay publishes to the broker
+            with transaction.atomic():
+                task = serializer.save(created_by=request.user if request.user.is_authenticated else None)
+                enqueue(process_task, task.id)
 
             # Return created task
             response_serializer = TaskSerializer(task)
@@ -49,6 +87,45 @@ class TaskListCreateView(generics.ListCreateAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class TaskBulkCreateView(generics.GenericAPIView):
+    """
+    API endpoint for creating many tasks in a single request
+    """
+    queryset = Task.objects.all()
+    serializer_class = TaskCreateSerializer
+
+    @swagger_auto_schema(
+        operation_description="Create a list of tasks in one transaction and queue them for processing in chunks",
+        request_body=TaskCreateSerializer(many=True),
+        responses={
+            201: TaskSerializer(many=True),
+            400: 'Bad Request'
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = TaskCreateSerializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=settings.TASK_BULK_CREATE_MAX_SIZE
+        )
+        if serializer.is_valid():
+            created_by = request.user if request.user.is_authenticated else None
+
+            # Create all tasks with batched INSERTs and queue their
+            # processing in the same transaction
+            with transaction.atomic():
+                tasks = Task.objects.bulk_create(
+                    [Task(created_by=created_by, **item) for item in serializer.validated_data],
+                    batch_size=500
+                )
+                enqueue_process_tasks([task.id for task in tasks])
+
+            response_serializer = TaskSerializer(tasks, many=True)
+            return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
 class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
     API endpoint for retrieving, updating, and deleting individual tasks
@@ -56,19 +133,90 @@ class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        # Served from the task cache; writes and status transitions invalidate it
+        data = get_task_representation(
+            kwargs[self.lookup_url_kwarg or self.lookup_field],
+            lambda: self.get_serializer(self.get_object()).data
+        )
+        return conditional_response(request, lambda: Response(data), task_etag(data), data['updated_at'])
+
 
-class EmailLogListView(generics.ListAPIView):
+class EmailLogListView(ConditionalListMixin, ValuesListMixin, OptionalCursorPaginationMixin, generics.ListAPIView):
     """
     API endpoint for listing email logs
     """
     queryset = EmailLog.objects.all()
     serializer_class = EmailLogSerializer
+    cursor_pagination_class = EmailLogCursorPagination
+    values_serializer = ValuesSerializer(EmailLogSerializer)
+    filter_backends = [FieldFilter, FullTextSearchFilter]
+    filter_fields = ['success', 'recipient']
+    filter_range_fields = ['sent_at']
+    # Outcomes are written in place with no timestamp to track them, so the
+    # ETag hashes whole rows
+    etag_fields = None
+
+
+@require_GET
+def task_export_view(request):
+    """
+    Stream all tasks as NDJSON or CSV, optionally limited by created_at
+    """
+    return streaming_export(request, Task.objects.all(), TASK_EXPORT_FIELDS, 'created_at', 'tasks')
+
+
+@require_GET
+def email_log_export_view(request):
+    """
+    Stream all email logs as NDJSON or CSV, optionally limited by sent_at
+    """
+    return streaming_export(request, EmailLog.objects.all(), EMAIL_LOG_EXPORT_FIELDS, 'sent_at', 'email-logs')
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint for this process's metrics, labelled with its
+    pid. Behind several workers each scrape reaches one of them; scrape the
+    per-worker WEB_METRICS_PORT exporters for complete series.
+    """
+    return HttpResponse(registry.render(process_labels()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Number of tasks in each status, read from incrementally maintained counters",
+    responses={
+        200: openapi.Response(
+            'Task counts',
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'total': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    'by_status': openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        additional_properties=openapi.Schema(type=openapi.TYPE_INTEGER)
+                    )
+                }
+            )
+        )
+    }
+)
+@api_view(['GET'])
+def task_stats_view(request):
+    """
+    Task counts per status without scanning the task table
+    """
+    counts = dict(TaskStatusCount.objects.values_list('status', 'count'))
+    by_status = {choice: counts.get(choice, 0) for choice, _ in Task.TASK_STATUS_CHOICES}
+    return Response({'total': sum(by_status.values()), 'by_status': by_status})
 
 
 @swagger_auto_schema(
     method='post',
     operation_description="Send email notification asynchronously",
     request_body=EmailNotificationSerializer,
+    manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
     responses={
         202: openapi.Response(
             'Email queued for sending',
@@ -84,6 +232,7 @@ class EmailLogListView(generics.ListAPIView):
     }
 )
 @api_view(['POST'])
+@idempotent('send-email')
 def send_email_view(request):
     """
     Send email notification using Celery background task
@@ -94,20 +243,59 @@ def send_email_view(request):
         subject = serializer.validated_data['subject']
         message = serializer.validated_data['message']
 
-        # Queue email for sending
-        task = send_email_notification.delay(recipient, subject, message)
+        # Queue email for sending through the outbox
+        task_id = enqueue(send_email_notification, recipient, subject, message)
 
         return Response({
             'message': 'Email queued for sending',
-            'task_id': str(task.id)
+            'task_id': task_id
         }, status=status.HTTP_202_ACCEPTED)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@swagger_auto_schema(
+    method='post',
+    operation_description="Look up the state and result of many Celery tasks (e.g. queued emails) in one call",
+    request_body=TaskResultLookupSerializer,
+    responses={
+        200: openapi.Response(
+            'Task states in request order',
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'results': openapi.Schema(
+                        type=openapi.TYPE_ARRAY,
+                        items=openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                'task_id': openapi.Schema(type=openapi.TYPE_STRING),
+                                'state': openapi.Schema(type=openapi.TYPE_STRING),
+                                'result': openapi.Schema(type=openapi.TYPE_OBJECT),
+                                'date_done': openapi.Schema(type=openapi.TYPE_STRING, format='date-time')
+                            }
+                        )
+                    )
+                }
+            )
+        ),
+        400: 'Bad Request'
+    }
+)
+@api_view(['POST'])
+def task_results_view(request):
+    """
+    Batched Celery result lookup, read from the result backend in one round trip
+    """
+    serializer = TaskResultLookupSerializer(data=request.data)
+    if serializer.is_valid():
+        return Response({'results': get_task_results(serializer.validated_data['task_ids'])})
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
 @swagger_auto_schema(
     method='get',
-    operation_description="Check application health status",
+    operation_description="Check database, Redis and Celery worker health (cached for a few seconds)",
     responses={
         200: openapi.Response(
             'Health status',
@@ -116,7 +304,13 @@ def send_email_view(request):
                 properties={
                     'status': openapi.Schema(type=openapi.TYPE_STRING),
                     'database': openapi.Schema(type=openapi.TYPE_STRING),
-                    'celery': openapi.Schema(type=openapi.TYPE_STRING)
+                    'redis': openapi.Schema(type=openapi.TYPE_STRING),
+                    'celery': openapi.Schema(type=openapi.TYPE_STRING),
+                    'latency_ms': openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        additional_properties=openapi.Schema(type=openapi.TYPE_NUMBER)
+                    ),
+                    'cached': openapi.Schema(type=openapi.TYPE_BOOLEAN)
                 }
             )
         )
@@ -127,22 +321,4 @@ def health_check_view(request):
     """
     Health check endpoint for monitoring
     """
-    try:
-        # Check database
-        Task.objects.count()
-        database_status = 'healthy'
-    except Exception:
-        database_status = 'unhealthy'
-
-    try:
-        # Check Celery (basic check)
-        from .tasks import debug_task
-        celery_status = 'healthy'
-    except Exception:
-        celery_status = 'unhealthy'
-
-    return Response({
-        'status': 'healthy' if database_status == 'healthy' and celery_status == 'healthy' else 'unhealthy',
-        'database': database_status,
-        'celery': celery_status
-    })
\ No newline at end of file
+    return Response(get_health())
@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 from decouple import config
+from corsheaders.defaults import default_headers
+from kombu import Exchange, Queue
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
@@ -29,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -98,6 +102,37 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache (in-process unless CACHE_URL points at Redis)
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Task status event stream: Redis pub/sub URL shared by web and worker
+# processes; empty keeps events inside each process
+TASK_EVENTS_URL = config('TASK_EVENTS_URL', default='')
+# Keepalive comment interval and longest lifetime of one event stream
+# (clients reconnect), in seconds
+TASK_EVENTS_HEARTBEAT_SECONDS = config('TASK_EVENTS_HEARTBEAT_SECONDS', default=15, cast=int)
+TASK_EVENTS_MAX_SECONDS = config('TASK_EVENTS_MAX_SECONDS', default=300, cast=int)
+# Most tasks one stream may watch by id
+TASK_EVENTS_MAX_TASKS = config('TASK_EVENTS_MAX_TASKS', default=100, cast=int)
+
+# Seconds a serialized task stays cached for TaskDetailView; 0 disables
+# the cache. Off without CACHE_URL: Celery workers invalidate entries
+# when tasks change, and a per-process cache would never see that.
+TASK_CACHE_TIMEOUT = config('TASK_CACHE_TIMEOUT', default=300 if CACHE_URL else 0, cast=int)
+
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -110,6 +145,31 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20
 }
 
+# Opt-in orjson-backed JSON rendering (byte-identical to the default renderer)
+if config('FAST_JSON_RENDERER', default=False, cast=bool):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ]
+
+# Admin changelists: above this many (estimated) rows report the planner
+# estimate instead of an exact COUNT(*); without estimates, exact counts are
+# cached for ADMIN_COUNT_CACHE_SECONDS
+ADMIN_EXACT_COUNT_THRESHOLD = config('ADMIN_EXACT_COUNT_THRESHOLD', default=10000, cast=int)
+ADMIN_COUNT_CACHE_SECONDS = config('ADMIN_COUNT_CACHE_SECONDS', default=60, cast=int)
+
+# Rows fetched per server-side cursor round trip by the export endpoints
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Health checks: per-dependency timeout and how long a result is reused
+HEALTH_CHECK_TIMEOUT = config('HEALTH_CHECK_TIMEOUT', default=1.0, cast=float)
+HEALTH_CHECK_CACHE_SECONDS = config('HEALTH_CHECK_CACHE_SECONDS', default=5.0, cast=float)
+
+# Per-request query profiling (Server-Timing headers, N+1 and slow request logs)
+QUERY_PROFILING_ENABLED = config('QUERY_PROFILING_ENABLED', default=False, cast=bool)
+QUERY_PROFILING_REPEAT_THRESHOLD = config('QUERY_PROFILING_REPEAT_THRESHOLD', default=5, cast=int)
+QUERY_PROFILING_SLOW_REQUEST_MS = config('QUERY_PROFILING_SLOW_REQUEST_MS', default=500, cast=int)
+
 # Swagger settings
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
@@ -126,6 +186,8 @@ SWAGGER_SETTINGS = {
 
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
+# Browsers must be allowed to send Idempotency-Key on cross-origin POSTs
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 # Celery Configuration
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
@@ -135,6 +197,126 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Queue topology: long-running task processing, latency-sensitive email and
+# periodic maintenance each get their own queue and worker profile (see
+# scripts/celery_worker.sh), so a burst of processing cannot delay email
+CELERY_TASK_QUEUES = tuple(
+    Queue(name, Exchange(name), routing_key=name)
+    for name in ('processing', 'email', 'maintenance')
+)
+CELERY_TASK_DEFAULT_QUEUE = 'processing'
+CELERY_TASK_DEFAULT_EXCHANGE = 'processing'
+CELERY_TASK_DEFAULT_ROUTING_KEY = 'processing'
+CELERY_TASK_ROUTES = {
+    'core.tasks.process_task': {'queue': 'processing', 'priority': 3},
+    'core.tasks.process_task_batch': {'queue': 'processing', 'priority': 6},
+    'core.tasks.send_email_notification': {'queue': 'email'},
+    'core.tasks.send_email_notifications_batch': {'queue': 'email'},
+    'core.tasks.cleanup_old_tasks': {'queue': 'maintenance'},
+    'core.tasks.reconcile_task_status_counts': {'queue': 'maintenance'},
+}
+
+# Redis emulates priorities with one list per step; 0 is consumed first.
+# Single task submissions outrank bulk chunks within the processing queue.
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+}
+
+# Per-worker-process rate limit for outgoing email (Celery rate syntax, e.g.
+# '60/m'); empty disables it
+EMAIL_TASK_RATE_LIMIT = config('EMAIL_TASK_RATE_LIMIT', default='120/m') or None
+
+# Notifications sent per send_email_notifications_batch task. Celery
+# limits task runs, not emails, so the batch task's limit is divided by
+# the batch size to keep the same email rate.
+EMAIL_BATCH_SIZE = config('EMAIL_BATCH_SIZE', default=10, cast=int)
+
+
+def _per_batch_rate(rate, batch_size):
+    if rate is None:
+        return None
+    count, _, unit = rate.partition('/')
+    return f"{float(count) / batch_size:g}/{unit or 's'}"
+
+
+CELERY_TASK_ANNOTATIONS = {
+    'core.tasks.send_email_notification': {'rate_limit': EMAIL_TASK_RATE_LIMIT},
+    'core.tasks.send_email_notifications_batch': {
+        'rate_limit': _per_batch_rate(EMAIL_TASK_RATE_LIMIT, EMAIL_BATCH_SIZE)
+    },
+    # Processing messages are acknowledged after they run, so the broker
+    # redelivers them if a worker dies mid-run; a redelivered message may
+    # reclaim tasks left in processing (see process_task). Runs must stay
+    # well under the Redis visibility_timeout (1h) or they are redelivered
+    # while still running.
+    'core.tasks.process_task': {'acks_late': True, 'reject_on_worker_lost': True},
+    'core.tasks.process_task_batch': {'acks_late': True, 'reject_on_worker_lost': True},
+}
+
+CELERY_BEAT_SCHEDULE = {
+    'cleanup-old-tasks': {
+        'task': 'core.tasks.cleanup_old_tasks',
+        'schedule': config('RETENTION_INTERVAL', default=3600, cast=int),
+    },
+    'reconcile-task-status-counts': {
+        'task': 'core.tasks.reconcile_task_status_counts',
+        'schedule': config('TASK_STATS_RECONCILE_INTERVAL', default=3600, cast=int),
+    },
+}
+
+# Data retention: rows older than ``days`` (by ``date_field``) and matching
+# ``filters`` are pruned in primary-key batches within a per-run time budget
+RETENTION_POLICIES = {
+    'tasks': {
+        'model': 'core.Task',
+        'date_field': 'updated_at',
+        'days': config('TASK_RETENTION_DAYS', default=30, cast=int),
+        'filters': {'status': 'completed'},
+    },
+    'email_logs': {
+        'model': 'core.EmailLog',
+        'date_field': 'sent_at',
+        'days': config('EMAIL_LOG_RETENTION_DAYS', default=90, cast=int),
+    },
+    'outbox': {
+        'model': 'core.OutboxMessage',
+        'date_field': 'published_at',
+        'days': config('OUTBOX_RETENTION_DAYS', default=7, cast=int),
+    },
+}
+RETENTION_BATCH_SIZE = config('RETENTION_BATCH_SIZE', default=1000, cast=int)
+RETENTION_BATCH_PAUSE = config('RETENTION_BATCH_PAUSE', default=0.5, cast=float)
+RETENTION_TIME_BUDGET = config('RETENTION_TIME_BUDGET', default=120, cast=int)
+
+# Port for the per-process worker metrics exporter (disabled when 0); each
+# pool process listens on this port plus its pool index
+CELERY_METRICS_PORT = config('CELERY_METRICS_PORT', default=0, cast=int)
+# Same for web workers (gunicorn/uvicorn --workers): each process serves its
+# metrics on the first free port of WEB_METRICS_PORT..+WEB_METRICS_MAX_WORKERS
+WEB_METRICS_PORT = config('WEB_METRICS_PORT', default=0, cast=int)
+WEB_METRICS_MAX_WORKERS = config('WEB_METRICS_MAX_WORKERS', default=16, cast=int)
+
+# Task processing
+TASK_BULK_CREATE_MAX_SIZE = config('TASK_BULK_CREATE_MAX_SIZE', default=5000, cast=int)
+TASK_BULK_DISPATCH_CHUNK_SIZE = config('TASK_BULK_DISPATCH_CHUNK_SIZE', default=25, cast=int)
+# Idempotency-Key support on task creation and email sending: how long a
+# completed response is replayed, and how long an in-flight claim lasts if
+# its process dies before finishing (seconds)
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=86400, cast=int)
+IDEMPOTENCY_LOCK_TIMEOUT = config('IDEMPOTENCY_LOCK_TIMEOUT', default=60, cast=int)
+# Most Celery task ids one result lookup may ask for
+TASK_RESULT_LOOKUP_MAX_IDS = config('TASK_RESULT_LOOKUP_MAX_IDS', default=1000, cast=int)
+
+# Outbox relay (python manage.py relay_outbox): messages published per
+# batch, seconds to wait once the outbox has been drained, and failed
+# publishes (broker outages aside) before a message is parked
+OUTBOX_RELAY_BATCH_SIZE = config('OUTBOX_RELAY_BATCH_SIZE', default=100, cast=int)
+OUTBOX_RELAY_INTERVAL = config('OUTBOX_RELAY_INTERVAL', default=0.5, cast=float)
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+
 # Email configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
@@ -144,6 +326,16 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@example.com')
 
+# Pooled email connections kept open per worker process
+EMAIL_POOL_SIZE = config('EMAIL_POOL_SIZE', default=2, cast=int)
+EMAIL_POOL_MAX_AGE = config('EMAIL_POOL_MAX_AGE', default=300, cast=int)
+
+# Buffered email log writes; EMAIL_LOG_MAX_BUFFER bounds what a worker
+# holds while flushes keep failing
+EMAIL_LOG_BUFFER_SIZE = config('EMAIL_LOG_BUFFER_SIZE', default=50, cast=int)
+EMAIL_LOG_FLUSH_INTERVAL = config('EMAIL_LOG_FLUSH_INTERVAL', default=5.0, cast=float)
+EMAIL_LOG_MAX_BUFFER = config('EMAIL_LOG_MAX_BUFFER', default=1000, cast=int)
+
 
 # Logging Configuration
 LOGGING = {
@@ -1,15 +1,74 @@
 from .base import *
+import os
+from urllib.parse import urlsplit
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 DEBUG = False
 
 # Production database configuration
+#
+# Celery pool processes (and any WSGI worker) keep their connection open
+# for DB_CONN_MAX_AGE seconds and check it before reuse, so tasks skip the
+# connect/auth handshake. DATABASE_POOL=True uses Django's psycopg 3 pool
+# instead.
+#
+# Under ASGI, sync ORM calls run on executor threads and Django only
+# closes persistent connections on the request thread, so connections
+# kept open there would leak. The ASGI web server therefore pools by
+# default; with DATABASE_POOL=False it connects per request.
+SERVES_ASGI = os.environ.get('DJANGO_SERVER_INTERFACE') == 'asgi'
+DATABASE_POOL = config('DATABASE_POOL', default=SERVES_ASGI, cast=bool)
+
+if DATABASE_POOL or SERVES_ASGI:
+    DB_CONN_MAX_AGE = 0
+else:
+    DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=600, cast=int)
+
 DATABASES = {
     'default': dj_database_url.config(
-        default=config('DATABASE_URL')
+        default=config('DATABASE_URL'),
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True
     )
 }
 
+if DATABASE_POOL:
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': config('DATABASE_POOL_MIN_SIZE', default=1, cast=int),
+        'max_size': config('DATABASE_POOL_MAX_SIZE', default=4, cast=int),
+        # Seconds a checkout may wait before raising PoolTimeout
+        'timeout': config('DATABASE_POOL_TIMEOUT', default=10.0, cast=float),
+        # Recycle connections periodically and close surplus idle ones
+        'max_lifetime': config('DATABASE_POOL_MAX_LIFETIME', default=1800.0, cast=float),
+        'max_idle': config('DATABASE_POOL_MAX_IDLE', default=300.0, cast=float),
+    }
+
+# Shared Redis cache. It must be a separate instance from the Celery
+# broker: the cache runs under an LRU eviction policy, which on a shared
+# instance could evict queue keys and silently drop messages. The broker
+# instance should run with maxmemory-policy noeviction.
+CACHE_URL = config('CACHE_URL')
+
+
+def _redis_instance(url):
+    # Database indexes (/0, /1, ...) share one instance and its eviction policy
+    parts = urlsplit(url)
+    return (parts.hostname, parts.port or 6379)
+
+
+if _redis_instance(CACHE_URL) == _redis_instance(CELERY_BROKER_URL):
+    raise ImproperlyConfigured('CACHE_URL must point at a different Redis instance than CELERY_BROKER_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_URL,
+    }
+}
+
+# Task status events cross from Celery workers to web processes over Redis
+TASK_EVENTS_URL = config('TASK_EVENTS_URL', default=CELERY_BROKER_URL)
+
 # Security settings for production
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
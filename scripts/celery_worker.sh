@@ -1,7 +1,44 @@
 #!/bin/bash
 
 # Celery worker start script
-echo "Starting Celery Worker..."
+#
+# Usage: scripts/celery_worker.sh [processing|email|maintenance|all]
+#
+# Each profile consumes one queue with a pool and prefetch suited to its
+# work; concurrency can be overridden with CELERY_WORKER_CONCURRENCY.
+PROFILE=${1:-${CELERY_WORKER_PROFILE:-all}}
+
+case "$PROFILE" in
+    processing)
+        # Long-running jobs: take one message at a time per process
+        QUEUES=processing
+        CONCURRENCY=${CELERY_WORKER_CONCURRENCY:-4}
+        PREFETCH=1
+        ;;
+    email)
+        # Short I/O-bound sends: more processes and a deeper prefetch
+        QUEUES=email
+        CONCURRENCY=${CELERY_WORKER_CONCURRENCY:-4}
+        PREFETCH=4
+        ;;
+    maintenance)
+        QUEUES=maintenance
+        CONCURRENCY=${CELERY_WORKER_CONCURRENCY:-1}
+        PREFETCH=1
+        ;;
+    all)
+        # Single worker for small deployments and local development
+        QUEUES=email,processing,maintenance
+        CONCURRENCY=${CELERY_WORKER_CONCURRENCY:-2}
+        PREFETCH=1
+        ;;
+    *)
+        echo "Unknown worker profile: $PROFILE" >&2
+        exit 1
+        ;;
+esac
+
+echo "Starting Celery Worker ($PROFILE profile)..."
 
 # Activate virtual environment
 source venv/bin/activate
@@ -9,5 +46,8 @@ source venv/bin/activate
 # Start Celery worker
 exec celery -A deployment_project worker \
     --loglevel=info \
-    --concurrency=2 \
-    --max-tasks-per-child=1000
\ No newline at end of file
+    --hostname="$PROFILE@%h" \
+    --queues="$QUEUES" \
+    --concurrency="$CONCURRENCY" \
+    --prefetch-multiplier="$PREFETCH" \
+    --max-tasks-per-child=1000
@@ -15,7 +15,8 @@ python manage.py collectstatic --noinput
 # Run database migrations
 python manage.py migrate
 
-# Start Gunicorn server
+# Start Gunicorn server (WSGI). The task event stream under
+# /api/v1/async/tasks/events/ needs ASGI: use scripts/start_asgi.sh
 exec gunicorn deployment_project.wsgi:application \
     --bind 0.0.0.0:8000 \
     --workers 3 \
@@ -0,0 +1,22 @@
+#!/bin/bash
+
+# ASGI start script: serves both the sync API and the async endpoints
+# under /api/v1/async/ from an event loop per worker process
+echo "Starting Django Deployment Project (ASGI)..."
+
+# Activate virtual environment
+source venv/bin/activate
+
+# Collect static files
+python manage.py collectstatic --noinput
+
+# Run database migrations
+python manage.py migrate
+
+# Start Uvicorn server
+exec uvicorn deployment_project.asgi:application \
+    --host 0.0.0.0 \
+    --port 8000 \
+    --workers ${WEB_CONCURRENCY:-3} \
+    --timeout-keep-alive 5 \
+    --log-level info